@@ -1,3 +1,28 @@
+from .binary import BinaryTemplate
+from .change import ChangeDetector
+from .color import ColorSpec
+from .fft import FFTEngine, PyFFTWEngine, get_engine
+from .library import TemplateLibrary, build_library
 from .match import Match
+from .ocr import GlyphDict
+from .prefilter import ColorPrefilter
+from .record import FrameRecorder, ReplayFrameSource
+from .snapshot import Snapshot
+from .source import (
+    FrameSource, MssFrameSource, SequenceFrameSource,
+    ArrayFrameSource, ImageDirFrameSource, NpyFrameSource,
+)
+from .template import PreparedTemplate, TemplateCache
+from .tiled import TiledNCC
+from .tracker import Tracker
 
-__all__ = ["Match"]
+__all__ = [
+    "Match", "Snapshot", "PreparedTemplate", "TemplateCache",
+    "FrameSource", "MssFrameSource", "SequenceFrameSource",
+    "ArrayFrameSource", "ImageDirFrameSource", "NpyFrameSource",
+    "FrameRecorder", "ReplayFrameSource",
+    "TemplateLibrary", "build_library", "Tracker",
+    "ChangeDetector", "TiledNCC",
+    "FFTEngine", "PyFFTWEngine", "get_engine", "GlyphDict",
+    "BinaryTemplate", "ColorPrefilter", "ColorSpec",
+]
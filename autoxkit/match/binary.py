@@ -0,0 +1,185 @@
+import math
+
+import numpy as np
+
+from ..utils import POPCOUNT, DataHeader
+from .color import color_mask
+
+# 早停：每累加 REJECT_ROWS 行检查一次，失配数超过预算的候选不再参与后续行
+REJECT_ROWS = 4
+# 源图按行分带处理，每带 BAND_ROWS 个候选行，限制 64 位窗口字 (每字节位置 16 字节) 的临时内存
+BAND_ROWS = 64
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+        uint64 数组逐元素求 1 的个数
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    # numpy < 2.0 没有 bitwise_count 时按字节查表
+    return POPCOUNT[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def binarize_image(image: np.ndarray, colors: list[str | tuple] = None, color_similarity: float = 0.8,
+                   threshold: float = 128, gray: np.ndarray = None) -> np.ndarray:
+    """
+        二值化：提供 colors 时与任一颜色相似的像素为 1，否则灰度不低于 threshold 的像素为 1
+    Args:
+        image (np.ndarray): RGB (或 RGBA) 图像，已是布尔数组时直接返回
+        colors (list): 前景颜色列表，元素为十六进制字符串或 (r, g, b) 元组
+        color_similarity (float): 颜色相似度阈值，同 find_colors
+        threshold (float): 亮度阈值 (0 ~ 255)，未提供 colors 时使用
+        gray (np.ndarray): 已有的灰度平面，不提供时由 image 转换
+    Returns:
+        np.ndarray: 布尔数组 (H, W)
+    """
+    if image.dtype == bool:
+        return image
+    if colors:
+        return color_mask(image[..., :3], colors, color_similarity)
+    if gray is None:
+        gray = DataHeader().rgb_to_gray(image)
+    return gray >= threshold
+
+
+class BinaryTemplate:
+    """
+    按位打包的二值模板：每行按 64 位一个字存放 (高位在左)，末尾不足 64 位的部分以及掩码外的像素
+    在 valid 中为 0，不参与计数。
+    """
+    def __init__(self, bits: np.ndarray, mask: np.ndarray = None):
+        """
+        Args:
+            bits (np.ndarray): 二值模板 (H, W)
+            mask (np.ndarray): 与模板同尺寸的布尔掩码，False 的像素不参与匹配
+        """
+        bits = np.asarray(bits, dtype=bool)
+        self.shape = bits.shape
+        valid = np.ones(bits.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        if valid.shape != bits.shape:
+            raise ValueError(f"mask 尺寸 {valid.shape} 与模板尺寸 {bits.shape} 不一致")
+        self.words = self._pack(bits & valid)
+        self.valid = self._pack(valid)
+        self.nbits = int(np.count_nonzero(valid))
+        # 匹配时先比较前景像素多的行：背景上的候选在这些行就会超出失配预算，早停更有效
+        foreground = np.count_nonzero(bits & valid, axis=1)
+        self.order = np.argsort(-foreground, kind='stable')
+        self.foreground = np.cumsum(foreground[self.order])     # 按 order 累计的前景像素数
+
+    @staticmethod
+    def _pack(bits: np.ndarray) -> np.ndarray:
+        """
+        按行打包为大端 uint64 字 (H, ceil(W / 64))
+        """
+        height, width = bits.shape
+        nwords = -(-width // 64)
+        packed = np.zeros((height, nwords * 8), dtype=np.uint8)
+        packed[:, :-(-width // 8)] = np.packbits(bits, axis=1)
+        return packed.view('>u8').astype(np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        """返回打包数据占用的字节数"""
+        return self.words.nbytes + self.valid.nbytes
+
+
+def _window_words(packed: np.ndarray, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    从每个字节位置起取 64 位 (hi) 及其后一个字节 (lo)，位偏移 r 的窗口字为 (hi << r) | (lo >> (8 - r))
+    """
+    hi = np.zeros((packed.shape[0], count), dtype=np.uint64)
+    for m in range(8):
+        hi |= packed[:, m:m + count].astype(np.uint64) << np.uint64(56 - 8 * m)
+    lo = packed[:, 8:8 + count].astype(np.uint64)
+    return hi, lo
+
+
+def _match_band(packed: np.ndarray, template: BinaryTemplate, width: int, budget: int,
+                first: int) -> tuple[int, int, int] | None:
+    """
+    在一带位平面中查找失配最少的候选，返回 (失配位数, y, x)，y 相对带的首行
+    """
+    th, tw = template.shape
+    nwords = template.words.shape[1]
+    ny = packed.shape[0] - th + 1
+    hi, lo = _window_words(packed, packed.shape[1] - 8)
+    best = None
+    for r in range(8):
+        nk = (width - tw - r) // 8 + 1     # x = 8k + r 的候选列数
+        if nk <= 0:
+            break
+        words = (hi << np.uint64(r)) | (lo >> np.uint64(8 - r))
+
+        # 按 template.order 的行顺序累加：前 first 行对所有候选整块计算 (切片)，之后只对剩余候选按索引计算；
+        # first 取到前景像素累计超过预算为止，使全背景的窗口在第一次筛选时就被淘汰
+        score = np.zeros((ny, nk), dtype=np.uint32)
+        for i in template.order[:first].tolist():
+            for j in range(nwords):
+                score += popcount((words[i:i + ny, 8 * j:8 * j + nk] ^ template.words[i, j]) & template.valid[i, j])
+        ys, ks = np.nonzero(score <= budget)
+        score = score[ys, ks]
+
+        for n, i in enumerate(template.order[first:].tolist(), 1):
+            if ys.size == 0:
+                break
+            for j in range(nwords):
+                score += popcount((words[ys + i, ks + 8 * j] ^ template.words[i, j]) & template.valid[i, j])
+            if n % REJECT_ROWS == 0:
+                keep = score <= budget
+                ys, ks, score = ys[keep], ks[keep], score[keep]
+
+        if ys.size == 0:
+            continue
+        index = int(np.argmin(score))
+        candidate = (int(score[index]), int(ys[index]), 8 * int(ks[index]) + r)
+        if score[index] <= budget and (best is None or candidate < best):
+            best = candidate
+    return best
+
+
+def match_binary_mask(source: np.ndarray, template: BinaryTemplate,
+                      similarity: float = 0.9) -> tuple[int, int, int] | None:
+    """
+        在二值源图中查找失配位数最少的位置：源图按行打包为位平面 (每像素 1 位)，
+        按 x 方向的 8 种位偏移分别构造 64 位窗口字，与模板逐行异或并计数；
+        每累加 REJECT_ROWS 行，失配数已超过预算 (1 - similarity) × 有效位数的候选即被淘汰。
+        位平面只有灰度平面的 1/8 (RGB 的 1/24)；窗口字每字节位置占 16 字节，按 BAND_ROWS 行分带构造，
+        临时内存随带高而不是源图高度增长。
+    Args:
+        source (np.ndarray): 二值源图 (H, W)
+        template (BinaryTemplate): 二值模板
+        similarity (float): 相似度阈值，相似度为 1 - 失配位数 / 有效位数
+    Returns:
+        tuple[int, int, int] | None: 最佳位置左上角 (x, y) 与失配位数，没有满足阈值的位置时返回 None
+    """
+    height, width = source.shape
+    th, tw = template.shape
+    if th > height or tw > width or template.nbits == 0:
+        return None
+    # 允许的失配位数，加一个小量抵消浮点误差，如 (1 - 0.9) × 10 应为 1 而不是 0.999...
+    budget = math.floor((1 - similarity) * template.nbits + 1e-9)
+    nwords = template.words.shape[1]
+
+    # 位平面：每行 ceil(W / 8) 字节，右侧补零以便取最后一个窗口字
+    row_bytes = -(-width // 8)
+    count = row_bytes + 8 * (nwords - 1)
+    packed = np.zeros((height, count + 8), dtype=np.uint8)
+    packed[:, :row_bytes] = np.packbits(source, axis=1)
+
+    ny = height - th + 1
+    first = min(max(REJECT_ROWS, int(np.searchsorted(template.foreground, budget, side='right')) + 1), th)
+    best = None
+    for y0 in range(0, ny, BAND_ROWS):
+        # 候选行 y0 ~ y0 + BAND_ROWS - 1 需要源图的 y0 ~ y0 + BAND_ROWS + th - 2 行
+        candidate = _match_band(packed[y0:min(y0 + BAND_ROWS, ny) + th - 1], template, width, budget, first)
+        if candidate is None:
+            continue
+        candidate = (candidate[0], candidate[1] + y0, candidate[2])
+        if best is None or candidate < best:
+            best = candidate
+
+    if best is None:
+        return None
+    mismatch, y, x = best
+    return x, y, mismatch
@@ -0,0 +1,254 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from ..utils import RectTuple
+
+# 分块哈希的位置权重：块内每行、每列一个随机奇数 (uint32)，固定种子使每次运行的指纹一致
+_HASH_WEIGHTS = np.random.default_rng(0x5EED).integers(0, 2 ** 31, (2, 256), dtype=np.uint32) * np.uint32(2) + np.uint32(1)
+
+
+
+def _copy_result(result):
+    """
+    复制可变的查询结果 (列表、数组)，使缓存中的结果不会被调用方修改；元素为元组等不可变对象，浅复制即可
+    """
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    if isinstance(result, list):
+        return list(result)
+    return result
+
+def block_sums(image: np.ndarray, block_size: int = 16) -> np.ndarray:
+    """
+        按 block_size × block_size 分块求像素和，用于按容差判断分块亮度变化。
+        注意分块和只反映总亮度：块内元素移动、两个像素互换等总和不变的变化不会反映出来，精确判断见 block_hashes。
+        与 downsample 相同，逐个累加跨步切片；末尾不足一块的行列单独成块
+    Args:
+        image (np.ndarray): uint8 图像 (H, W) 或 (H, W, C)
+        block_size (int): 分块边长，不超过 256 (行累加使用 uint16)
+    Returns:
+        np.ndarray: 分块和 (ceil(H / block_size), ceil(W / block_size), ...)，uint32
+    """
+    height, width = image.shape[:2]
+    rows = np.zeros((-(-height // block_size), width, *image.shape[2:]), dtype=np.uint16)
+    for dy in range(block_size):
+        part = image[dy::block_size]
+        rows[:len(part)] += part
+
+    sums = np.zeros((rows.shape[0], -(-width // block_size), *image.shape[2:]), dtype=np.uint32)
+    for dx in range(block_size):
+        part = rows[:, dx::block_size]
+        sums[:, :part.shape[1]] += part
+    return sums
+
+
+def block_hashes(image: np.ndarray, block_size: int = 16) -> np.ndarray:
+    """
+        按 block_size × block_size 分块计算内容哈希：Σ r[dy]·c[dx]·p (uint32 按 2^32 回绕)，
+        r、c 为块内行、列位置的随机奇数权重，块内像素变化 (包括元素在块内移动) 会改变哈希，
+        变化后哈希恰好不变的概率约为 2^-32。与 block_sums 相同，逐个累加跨步切片
+    Args:
+        image (np.ndarray): uint8 图像 (H, W) 或 (H, W, C)
+        block_size (int): 分块边长，不超过 256
+    Returns:
+        np.ndarray: 分块哈希 (ceil(H / block_size), ceil(W / block_size), ...)，uint32
+    """
+    height, width = image.shape[:2]
+    row_weights, col_weights = _HASH_WEIGHTS
+    rows = np.zeros((-(-height // block_size), width, *image.shape[2:]), dtype=np.uint32)
+    weighted = np.empty_like(rows)
+    for dy in range(block_size):
+        part = image[dy::block_size]
+        n = len(part)
+        np.multiply(part, row_weights[dy], out=weighted[:n], casting='unsafe')
+        rows[:n] += weighted[:n]
+
+    hashes = np.zeros((rows.shape[0], -(-width // block_size), *image.shape[2:]), dtype=np.uint32)
+    for dx in range(block_size):
+        part = rows[:, dx::block_size]
+        hashes[:, :part.shape[1]] += part * col_weights[dx]
+    return hashes
+
+
+def _same_ref(a, b) -> bool:
+    """
+    按对象标识比较模板引用，元组逐项比较
+    """
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+    return a is b
+
+
+class ChangeDetector:
+    """
+    帧差门控：为每个监视区域保存分块指纹，区域内容未变化时直接返回缓存的匹配结果，不再重新计算 FFT。
+
+    缓存以 (区域, 查询键) 为键，查询键包含模板 (按对象标识) 和匹配参数；
+    区域指纹发生变化时，该区域的所有缓存结果失效，也可调用 invalidate() 显式失效。
+    截图本身仍会进行 (指纹需要像素)，节省的是灰度转换、FFT 和边缘验证。
+
+    tolerance 为 0 时按分块内容哈希判断，任何像素变化都会使缓存失效；
+    tolerance 大于 0 时按分块和判断平均亮度变化，块内元素移动等总和不变的变化不会被发现。
+    监视区域数和每个区域的缓存结果数都按 LRU 限制，缓存结果持有的模板引用随之释放。
+    """
+    def __init__(self, block_size: int = 16, tolerance: float = 0.0, max_rects: int = 64, max_results: int = 64):
+        """
+        Args:
+            block_size (int): 指纹分块边长 (像素)，2 ~ 256
+            tolerance (float): 分块内每像素平均变化不超过 tolerance 时视为未变化，默认 0 (任何变化都失效)
+            max_rects (int): 最多监视的区域数，超出时淘汰最久未使用的区域
+            max_results (int): 每个区域最多缓存的查询结果数
+        """
+        if not 2 <= block_size <= 256:
+            raise ValueError(f"block_size 必须在 2 ~ 256 之间，当前 block_size={block_size}")
+        self.block_size = block_size
+        self.tolerance = tolerance
+        self.max_rects = max_rects
+        self.max_results = max_results
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints = OrderedDict()  # 区域 -> 分块指纹 (哈希或分块和)
+        self._changed = {}                  # 区域 -> 最近一次 update() 的变化分块掩码
+        self._results = {}                  # 区域 -> OrderedDict{查询键: (模板引用, 结果)}
+
+    def update(self, rect: tuple[int, int, int, int], image: np.ndarray) -> np.ndarray:
+        """
+            计算区域的新指纹并与上一次比较，有变化时使该区域的缓存结果失效
+        Args:
+            rect (tuple): 区域 (x1, y1, x2, y2)，作为指纹的键
+            image (np.ndarray): 区域图像 (uint8)
+        Returns:
+            np.ndarray: 变化分块的布尔掩码 (块行数, 块列数)；首次出现或尺寸变化时全部为 True
+        """
+        rect = RectTuple(*rect)
+        if self.tolerance > 0:
+            fingerprint = block_sums(image, self.block_size)
+        else:
+            fingerprint = block_hashes(image, self.block_size)
+        previous = self._fingerprints.get(rect)
+
+        if previous is None or previous.shape != fingerprint.shape or previous.dtype != fingerprint.dtype:
+            changed = np.ones(fingerprint.shape[:2], dtype=bool)
+        elif self.tolerance > 0:
+            diff = np.abs(fingerprint.astype(np.int64) - previous)
+            if diff.ndim > 2:
+                diff = diff.max(axis=2)     # 任一通道变化即视为变化
+            changed = diff > self.tolerance * self._block_pixels(image.shape[:2])
+        else:
+            changed = fingerprint != previous
+            if changed.ndim > 2:
+                changed = changed.any(axis=2)
+
+        self._fingerprints[rect] = fingerprint
+        self._fingerprints.move_to_end(rect)
+        self._changed[rect] = changed
+        if changed.any():
+            self._results.pop(rect, None)
+        while len(self._fingerprints) > self.max_rects:
+            oldest, _ = self._fingerprints.popitem(last=False)
+            self._changed.pop(oldest, None)
+            self._results.pop(oldest, None)
+        return changed
+
+    def _block_pixels(self, shape: tuple[int, int]) -> np.ndarray:
+        """
+        每个分块的像素数 (末尾分块可能不足 block_size × block_size)
+        """
+        b = self.block_size
+        rows = np.minimum(b, shape[0] - np.arange(0, shape[0], b))
+        cols = np.minimum(b, shape[1] - np.arange(0, shape[1], b))
+        return np.outer(rows, cols)
+
+    def changed_blocks(self, rect: tuple[int, int, int, int]) -> np.ndarray | None:
+        """
+            返回区域最近一次 update() 的变化分块掩码，区域未被监视时返回 None
+        """
+        return self._changed.get(RectTuple(*rect))
+
+    def changed_rects(self, rect: tuple[int, int, int, int]) -> list[RectTuple]:
+        """
+            返回区域最近一次 update() 中发生变化的分块，坐标与 rect 相同 (屏幕坐标或窗口坐标)
+        """
+        rect = RectTuple(*rect)
+        changed = self._changed.get(rect)
+        if changed is None:
+            return []
+        b = self.block_size
+        rows, cols = np.nonzero(changed)
+        return [RectTuple(rect.x1 + c * b, rect.y1 + r * b,
+                          min(rect.x1 + (c + 1) * b, rect.x2), min(rect.y1 + (r + 1) * b, rect.y2))
+                for r, c in zip(rows.tolist(), cols.tolist())]
+
+    def get(self, rect: tuple[int, int, int, int], key: tuple, ref=None):
+        """
+            获取缓存结果，未缓存或模板引用不一致时返回 None
+        Args:
+            rect (tuple): 区域
+            key (tuple): 查询键 (查询类型和参数)
+            ref: 模板对象 (或对象元组，如模板和掩码)，与缓存时为同一对象才命中
+        """
+        results = self._results.get(RectTuple(*rect))
+        entry = results.get(key) if results is not None else None
+        if entry is not None and _same_ref(entry[0], ref):
+            results.move_to_end(key)
+            self.hits += 1
+            return _copy_result(entry[1])
+        self.misses += 1
+        return None
+
+    def put(self, rect: tuple[int, int, int, int], key: tuple, result, ref=None) -> None:
+        """
+            缓存查询结果的副本，区域变化、显式失效或被 LRU 淘汰前一直有效
+        """
+        results = self._results.setdefault(RectTuple(*rect), OrderedDict())
+        results[key] = (ref, _copy_result(result))
+        results.move_to_end(key)
+        while len(results) > self.max_results:
+            results.popitem(last=False)
+
+    def query(self, snapshot, key: tuple, compute, ref=None):
+        """
+            以快照更新区域指纹，区域未变化且已有缓存时直接返回缓存结果，否则调用 compute(snapshot) 并缓存。
+            缓存与命中时都复制可变结果 (如 mode='all' 的坐标列表、mode='mask' 的掩码数组)，
+            调用方修改返回值不会影响之后命中的结果
+        Args:
+            snapshot (Snapshot): 区域快照
+            key (tuple): 查询键 (查询类型和参数)
+            compute (callable): 计算结果的函数，参数为快照
+            ref: 模板对象 (或对象元组)，按对象标识区分模板
+        """
+        rect = snapshot.rect
+        self.update(rect, snapshot.image)
+        result = self.get(rect, key, ref)
+        if result is None:
+            result = compute(snapshot)
+            self.put(rect, key, result, ref)
+        return result
+
+    def invalidate(self, rect: tuple[int, int, int, int] = None) -> None:
+        """
+            显式失效缓存结果和指纹
+        Args:
+            rect (tuple): 区域，None 表示所有区域
+        """
+        if rect is None:
+            self._fingerprints.clear()
+            self._changed.clear()
+            self._results.clear()
+            return
+        rect = RectTuple(*rect)
+        self._fingerprints.pop(rect, None)
+        self._changed.pop(rect, None)
+        self._results.pop(rect, None)
+
+    def info(self) -> dict:
+        """
+            返回统计：监视区域数、缓存结果数、命中/未命中次数
+        """
+        return {
+            'rects': len(self._fingerprints),
+            'results': sum(len(results) for results in self._results.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,324 @@
+import math
+import numpy as np
+
+from ..utils import DataHeader
+
+# RGB 空间最大距离 ≈ 441.67
+MAX_DISTANCE = math.sqrt(255**2 * 3)
+
+
+def parse_color(color: str | tuple) -> tuple[int, int, int]:
+    """
+        将十六进制颜色字符串或 (r, g, b) 元组统一转换为 RGB 三元组
+    """
+    if type(color) is str:
+        return DataHeader().hex_to_rgb(color)
+    return tuple(int(c) for c in color[:3])
+
+
+def color_similarity(source_color: str | tuple, target_color: str | tuple) -> float:
+    """
+        计算两个颜色的相似度：1 - 欧几里得距离 / MAX_DISTANCE
+    """
+    source_color, target_color = parse_color(source_color), parse_color(target_color)
+    distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(source_color, target_color)))
+    return 1 - (distance / MAX_DISTANCE)
+
+
+class ColorSpec:
+    """
+    颜色规则：一个或多个可接受的颜色，每个颜色带逐通道容差 (如 R±10, G±5, B±20)，
+    像素落在任一颜色的 [颜色 - 容差, 颜色 + 容差] 范围内即为匹配。
+
+    规则只编译一次：单个颜色编译为上下界数组，直接逐通道比较；多个颜色编译为每通道一张 256 项查找表，
+    表项是 "该通道取值落在哪些颜色范围内" 的位掩码，三张表的结果按位与后非零即匹配，
+    整幅图像只需三次查表，耗时与颜色数量无关。
+
+    可以在所有接受颜色的接口 (match_color、find_color / find_colors、find_multi_color 等) 中代替颜色使用，
+    此时忽略 similarity 参数；也可以直接传入偏色字符串 'RRGGBB-DRDGDB'，多个颜色以 '|' 分隔。
+    """
+    def __init__(self, colors: str | tuple | list = None, tolerance: int | tuple = 0):
+        """
+        Args:
+            colors (str | tuple | list): 颜色 (十六进制字符串、偏色字符串 'FFAABB-0A0514|112233'、
+                                         (r, g, b) 元组或 ColorSpec) 或颜色列表
+            tolerance (int | tuple): 所有颜色共用的容差，整数表示三个通道相同，或 (dr, dg, db)；
+                                     偏色字符串中自带容差的颜色使用自带的容差
+        """
+        self._bounds = []   # [(下界, 上界), ...]，每项为 RGB 三元组
+        self._compiled = None
+        if colors is not None:
+            for color in ([colors] if isinstance(colors, (str, ColorSpec)) or _is_rgb(colors) else colors):
+                if isinstance(color, ColorSpec):
+                    self._bounds.extend(color._bounds)
+                elif isinstance(color, str) and ('-' in color or '|' in color):
+                    self._bounds.extend(ColorSpec.parse(color, tolerance)._bounds)
+                else:
+                    self.add(color, tolerance)
+
+    @classmethod
+    def parse(cls, text: str, tolerance: int | tuple = 0) -> 'ColorSpec':
+        """
+            解析偏色字符串，如 'FFAABB-0A0514|112233-050505'，'-' 后为十六进制的逐通道容差，
+            省略时使用 tolerance
+        """
+        spec = cls()
+        for item in text.split('|'):
+            color, _, offset = item.strip().partition('-')
+            spec.add(color, DataHeader().hex_to_rgb(offset) if offset else tolerance)
+        return spec
+
+    def add(self, color: str | tuple, tolerance: int | tuple = 0) -> 'ColorSpec':
+        """
+            添加一个可接受的颜色
+        Args:
+            color (str | tuple): 颜色，十六进制字符串或 (r, g, b) 元组
+            tolerance (int | tuple): 容差，整数表示三个通道相同，或 (dr, dg, db)
+        Returns:
+            ColorSpec: 自身，便于链式调用
+        """
+        rgb = parse_color(color)
+        tolerance = (tolerance,) * 3 if np.isscalar(tolerance) else tuple(tolerance)
+        lower = tuple(max(0, c - int(t)) for c, t in zip(rgb, tolerance))
+        upper = tuple(min(255, c + int(t)) for c, t in zip(rgb, tolerance))
+        self._bounds.append((lower, upper))
+        self._compiled = None
+        return self
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __repr__(self) -> str:
+        return f"ColorSpec({self.key})"
+
+    @property
+    def key(self) -> tuple:
+        """返回可哈希的规则内容 ((下界, 上界), ...)，用于缓存键"""
+        return tuple(self._bounds)
+
+    def compile(self):
+        """
+            编译规则：单个颜色为上下界数组，多个颜色为每通道的位掩码查找表 (每 64 个颜色一组)
+        """
+        if self._compiled is None:
+            if not self._bounds:
+                raise ValueError("ColorSpec 中没有颜色")
+            if len(self._bounds) == 1:
+                lower, upper = self._bounds[0]
+                self._compiled = ('bounds', np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+            else:
+                tables = []
+                for start in range(0, len(self._bounds), 64):
+                    group = self._bounds[start:start + 64]
+                    dtype = next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64)
+                                 if np.iinfo(t).bits >= len(group))
+                    table = np.zeros((3, 256), dtype=dtype)
+                    for bit, (lower, upper) in enumerate(group):
+                        for channel in range(3):
+                            table[channel, lower[channel]:upper[channel] + 1] |= dtype(1) << dtype(bit)
+                    tables.append(table)
+                self._compiled = ('lut', tables)
+        return self._compiled
+
+    def match(self, pixels: np.ndarray) -> np.ndarray:
+        """
+            判断一组像素是否匹配任一颜色
+        Args:
+            pixels (np.ndarray): 形状为 (..., 3) 的 uint8 RGB 像素数组
+        Returns:
+            np.ndarray: 形状为 pixels.shape[:-1] 的布尔数组
+        """
+        compiled = self.compile()
+        if compiled[0] == 'bounds':
+            _, lower, upper = compiled
+            result = (pixels[..., 0] >= lower[0]) & (pixels[..., 0] <= upper[0])
+            for channel in (1, 2):
+                result &= pixels[..., channel] >= lower[channel]
+                result &= pixels[..., channel] <= upper[channel]
+            return result
+
+        result = None
+        for table in compiled[1]:
+            bits = table[0][pixels[..., 0]]
+            bits &= table[1][pixels[..., 1]]
+            bits &= table[2][pixels[..., 2]]
+            result = bits != 0 if result is None else result | (bits != 0)
+        return result
+
+    def compare(self, color: str | tuple) -> tuple[bool, float]:
+        """
+            判断单个颜色是否匹配，并给出与最接近的规则颜色中心的相似度 (同 match_color)
+        Returns:
+            tuple: bool(是否匹配), float(相似度)
+        """
+        rgb = parse_color(color)
+        matched = bool(self.match(np.array(rgb, dtype=np.uint8)))
+        score = max(color_similarity(rgb, tuple((lo + hi) // 2 for lo, hi in zip(lower, upper)))
+                    for lower, upper in self._bounds)
+        return matched, round(score, 3)
+
+
+def _is_rgb(color) -> bool:
+    return isinstance(color, tuple) and len(color) in (3, 4) and all(np.isscalar(c) for c in color)
+
+
+def color_spec(color) -> ColorSpec | None:
+    """
+        颜色规则或偏色字符串 ('RRGGBB-DRDGDB'，'|' 分隔多个颜色) 转换为 ColorSpec，普通颜色返回 None
+    """
+    if isinstance(color, ColorSpec):
+        return color
+    if isinstance(color, str) and ('-' in color or '|' in color):
+        return ColorSpec.parse(color)
+    return None
+
+
+def color_key(color) -> tuple:
+    """
+        返回颜色的可哈希表示，用于缓存键：普通颜色为 RGB 三元组，颜色规则为其规则内容
+    """
+    spec = color_spec(color)
+    return spec.key if spec is not None else parse_color(color)
+
+
+def compare_colors(source_color: str | tuple | ColorSpec, target_color: str | tuple | ColorSpec,
+                   similarity: float = 0.8) -> tuple[bool, float]:
+    """
+        比较两个颜色，任一方为颜色规则时按规则判断，否则按相似度阈值判断；两个颜色规则之间无法比较
+    Returns:
+        tuple: bool(是否匹配), float(相似度)
+    """
+    spec = color_spec(target_color)
+    if spec is None:
+        spec, source_color = color_spec(source_color), target_color
+    elif color_spec(source_color) is not None:
+        raise ValueError("source_color 与 target_color 不能同时为颜色规则 (ColorSpec 或偏色字符串)")
+    if spec is not None:
+        return spec.compare(source_color)
+    score = color_similarity(source_color, target_color)
+    return score >= similarity, round(score, 3)
+
+
+def color_match(pixels: np.ndarray, color: str | tuple | ColorSpec, similarity: float = 0.8) -> np.ndarray:
+    """
+        判断一组像素是否与颜色相似，相似度与 match_color 一致：1 - 欧几里得距离 / MAX_DISTANCE
+        颜色为 ColorSpec 或偏色字符串时按逐通道容差判断，忽略 similarity
+    Args:
+        pixels (np.ndarray): 形状为 (..., 3) 的 RGB 像素数组
+        color (str | tuple | ColorSpec): 颜色，十六进制字符串、(r, g, b) 元组或颜色规则
+        similarity (float): 相似度阈值
+    Returns:
+        np.ndarray: 形状为 pixels.shape[:-1] 的布尔数组
+    """
+    spec = color_spec(color)
+    if spec is not None:
+        return spec.match(pixels)
+
+    # 比较距离平方，避免逐像素开方
+    limit = ((1 - similarity) * MAX_DISTANCE) ** 2
+    distance = np.zeros(pixels.shape[:-1], dtype=np.int32)
+    for i, value in enumerate(parse_color(color)):
+        diff = pixels[..., i].astype(np.int32)
+        diff -= value
+        diff *= diff
+        distance += diff
+    return distance <= limit
+
+
+def color_mask(image: np.ndarray, colors: list[str | tuple | ColorSpec] | ColorSpec,
+               similarity: float = 0.8) -> np.ndarray:
+    """
+        一次性计算整幅图像中与任一颜色相似的像素掩码
+    Args:
+        image (np.ndarray): RGB 图像 (H, W, 3)
+        colors (list | ColorSpec): 颜色列表，元素为十六进制字符串、(r, g, b) 元组或颜色规则；也可直接传入一个颜色规则
+        similarity (float): 相似度阈值
+    Returns:
+        np.ndarray: 布尔掩码 (H, W)
+    """
+    if isinstance(colors, ColorSpec):
+        colors = [colors]
+    mask = color_match(image, colors[0], similarity)
+    for color in colors[1:]:
+        mask |= color_match(image, color, similarity)
+    return mask
+
+
+def multi_color_mask(image: np.ndarray, base_color: str | tuple | ColorSpec,
+                     offsets_and_colors: list[tuple[int, int, str | tuple | ColorSpec]],
+                     similarity: float = 0.8) -> np.ndarray:
+    """
+        多点找色：基准点颜色匹配，且各偏移点 (x + dx, y + dy) 的颜色也匹配的所有基准点
+        先整图计算基准色掩码，再只对剩余候选点按偏移批量取像素比较，候选点逐轮减少
+    Args:
+        image (np.ndarray): RGB 图像 (H, W, 3)
+        base_color (str | tuple | ColorSpec): 基准点颜色或颜色规则
+        offsets_and_colors (list): [(dx, dy, color), ...] 偏移点及其颜色 (或颜色规则)
+        similarity (float): 相似度阈值
+    Returns:
+        np.ndarray: 基准点布尔掩码 (H, W)
+    """
+    height, width = image.shape[:2]
+    ys, xs = np.nonzero(color_match(image, base_color, similarity))
+
+    for dx, dy, color in offsets_and_colors:
+        if ys.size == 0:
+            break
+        px, py = xs + dx, ys + dy
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        xs, ys, px, py = xs[inside], ys[inside], px[inside], py[inside]
+        keep = color_match(image[py, px], color, similarity)
+        xs, ys = xs[keep], ys[keep]
+
+    mask = np.zeros((height, width), dtype=bool)
+    mask[ys, xs] = True
+    return mask
+
+
+def color_histogram(image: np.ndarray, bins: int = 4, weights: np.ndarray = None) -> np.ndarray:
+    """
+        量化颜色直方图：每个通道量化为 bins 级，共 bins³ 个颜色格
+    Args:
+        image (np.ndarray): RGB (或 RGBA，忽略 alpha) 图像，uint8 或 0 ~ 255 的浮点数
+        bins (int): 每个通道的量化级数，1 ~ 256
+        weights (np.ndarray): 每个像素的权重 (H, W)，如模板掩码，None 表示每个像素计 1
+    Returns:
+        np.ndarray: 长度为 bins³ 的像素计数 (float64)
+    """
+    # 每通道 40 级以内的颜色格编号用 uint16 即可，减少整图临时数组的内存带宽
+    dtype = np.uint16 if bins ** 3 <= 65536 else np.int32
+    index = np.zeros(image.shape[:2], dtype=dtype)
+    for i in range(3):
+        channel = image[..., i]
+        if channel.dtype != np.uint8:
+            channel = np.clip(channel, 0, 255).astype(np.uint8)
+        level = channel.astype(dtype)
+        level *= bins
+        level >>= 8
+        index *= bins
+        index += level
+    return np.bincount(index.ravel(), None if weights is None else weights.ravel(), minlength=bins ** 3).astype(np.float64)
+
+
+def mask_result(mask: np.ndarray, mode: str, offset_x: int = 0, offset_y: int = 0):
+    """
+        按 mode 整理掩码结果，并把坐标平移到屏幕/窗口坐标
+    Args:
+        mask (np.ndarray): 布尔掩码
+        mode (str): 'first' 返回首个命中坐标 (x, y)，未命中返回 (False, False)；
+                    'all' 返回所有命中坐标列表；'mask' 直接返回掩码
+        offset_x (int): x 方向偏移
+        offset_y (int): y 方向偏移
+    """
+    if mode == 'mask':
+        return mask
+    if mode == 'first':
+        index = np.argmax(mask)
+        if not mask.flat[index]:
+            return False, False
+        y, x = np.unravel_index(index, mask.shape)
+        return int(x + offset_x), int(y + offset_y)
+    if mode == 'all':
+        ys, xs = np.nonzero(mask)
+        return list(zip((xs + offset_x).tolist(), (ys + offset_y).tolist()))
+    raise ValueError(f"mode 必须为 'first'、'all' 或 'mask'，当前 mode={mode}")
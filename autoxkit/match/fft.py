@@ -0,0 +1,98 @@
+from scipy import fft as sp_fft
+
+
+class FFTEngine:
+    """
+    FFT 后端：找图中所有实数二维 FFT (模板频谱、源图频谱、逆变换) 都经由同一个后端计算。
+
+    默认使用 scipy.fft.rfft2 / irfft2：只计算实数输入的一半频谱，float32 输入保持单精度；
+    FFT 尺寸按 next_fast_len 补齐到只含小质因子的长度，避免落在大质数长度上导致变换变慢。
+    workers 为 scipy.fft 的并行线程数，-1 表示使用全部 CPU 核。
+    """
+    name = 'scipy'
+
+    def __init__(self, workers: int = None, fast_len: bool = True):
+        """
+        Args:
+            workers (int): FFT 并行线程数，None 为单线程，-1 为全部 CPU 核
+            fast_len (bool): 是否按 next_fast_len 补齐 FFT 尺寸，False 时直接使用源图尺寸 (仅用于对比)
+        """
+        self.workers = workers
+        self.fast_len = fast_len
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(workers={self.workers}, fast_len={self.fast_len})"
+
+    def fast_shape(self, shape: tuple[int, int]) -> tuple[int, int]:
+        """
+            返回不短于 shape 的快速 FFT 尺寸
+        """
+        if not self.fast_len:
+            return tuple(shape)
+        return tuple(sp_fft.next_fast_len(n, real=True) for n in shape)
+
+    def rfft2(self, x, shape: tuple[int, int]):
+        """
+            实数二维 FFT，输入补零到 shape
+        """
+        return sp_fft.rfft2(x, s=shape, workers=self.workers)
+
+    def irfft2(self, x, shape: tuple[int, int]):
+        """
+            实数二维逆 FFT，输出尺寸为 shape
+        """
+        return sp_fft.irfft2(x, s=shape, workers=self.workers)
+
+
+class PyFFTWEngine(FFTEngine):
+    """
+    pyFFTW 后端 (需要安装 pyfftw)：通过 pyfftw.interfaces.scipy_fft 调用 FFTW，并开启计划缓存，
+    同一尺寸的变换只在首次调用时规划。
+    """
+    name = 'pyfftw'
+
+    def __init__(self, workers: int = None, fast_len: bool = True):
+        try:
+            import pyfftw
+            import pyfftw.interfaces.scipy_fft as fftw_fft
+        except ImportError as e:
+            raise ImportError("使用 pyfftw 后端需要先安装 pyfftw: pip install pyfftw") from e
+        super().__init__(workers, fast_len)
+        pyfftw.interfaces.cache.enable()
+        self._fft = fftw_fft
+
+    def rfft2(self, x, shape: tuple[int, int]):
+        return self._fft.rfft2(x, s=shape, workers=self.workers if self.workers is not None else 1)
+
+    def irfft2(self, x, shape: tuple[int, int]):
+        return self._fft.irfft2(x, s=shape, workers=self.workers if self.workers is not None else 1)
+
+
+ENGINES = {'scipy': FFTEngine, 'pyfftw': PyFFTWEngine}
+
+# 未指定后端时使用的默认后端
+DEFAULT_ENGINE = FFTEngine()
+
+
+def get_engine(engine: str | FFTEngine = None, workers: int = None) -> FFTEngine:
+    """
+        获取 FFT 后端
+    Args:
+        engine (str | FFTEngine): 'scipy'、'pyfftw'、'auto' (已安装 pyfftw 时使用 pyfftw，否则 scipy)
+                                  或后端实例；None 返回默认后端
+        workers (int): FFT 并行线程数，engine 为实例时忽略
+    Returns:
+        FFTEngine: FFT 后端
+    """
+    if isinstance(engine, FFTEngine):
+        return engine
+    if engine is None:
+        return DEFAULT_ENGINE if workers is None else FFTEngine(workers)
+    if engine == 'auto':
+        try:
+            return PyFFTWEngine(workers)
+        except ImportError:
+            return FFTEngine(workers)
+    if engine not in ENGINES:
+        raise ValueError(f"engine 必须为 'scipy'、'pyfftw' 或 'auto'，当前 engine={engine}")
+    return ENGINES[engine](workers)
@@ -0,0 +1,202 @@
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from ..utils import DataHeader
+from .fft import FFTEngine
+from .pyramid import MIN_PYRAMID_SIZE
+from .template import PreparedTemplate, downsample, edge_detection
+
+# 文件头：魔数 + 索引长度 (uint64, 小端)，之后为 JSON 索引，数据区按 ALIGNMENT 对齐
+MAGIC = b'AXKLIB01'
+ALIGNMENT = 64
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def _template_arrays(image: np.ndarray) -> dict:
+    """
+    计算单个模板 (或其某一金字塔层) 需要存入模板库的数据
+    """
+    gray = DataHeader().rgb_to_gray(image)
+    return {
+        'image': image,
+        'gray': gray,
+        'edges': edge_detection(gray).astype(np.float32),   # 未乘掩码，由 PreparedTemplate 按掩码处理
+        'norm': float(np.linalg.norm(gray)),
+    }
+
+
+def build_library(directory: str, path: str, pyramid_levels: int = 2) -> 'TemplateLibrary':
+    """
+        把目录下的所有模板图片编译为一个可内存映射的模板库文件
+        每个模板保存 RGB (带透明通道时为 RGBA) 图像、灰度平面、模板能量、边缘图以及金字塔各层的同类数据，
+        以相对路径 (不含后缀，'/' 分隔) 为名称建立索引
+    Args:
+        directory (str): 模板图片目录，递归查找 png / jpg / jpeg / bmp
+        path (str): 输出的模板库文件路径
+        pyramid_levels (int): 预先生成的金字塔层数，模板过小时会自动减少
+    Returns:
+        TemplateLibrary: 打开的模板库
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"目录不存在: {directory}")
+
+    arrays = []     # 待写入的数组，按顺序排列在数据区
+    offset = 0
+
+    def add_array(array: np.ndarray) -> dict:
+        nonlocal offset
+        array = np.ascontiguousarray(array)
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        entry = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+        arrays.append((offset, array))
+        offset += array.nbytes
+        return entry
+
+    def add_template(data: dict) -> dict:
+        return {
+            'image': add_array(data['image']),
+            'gray': add_array(data['gray']),
+            'edges': add_array(data['edges']),
+            'norm': data['norm'],
+        }
+
+    templates = {}
+    image_paths = sorted(p for p in directory.rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+    for image_path in image_paths:
+        with Image.open(image_path) as image:
+            # 带透明通道的模板保留 alpha，匹配时作为掩码
+            image = np.asarray(image.convert('RGBA' if DataHeader().has_alpha(image) else 'RGB'))
+        entry = add_template(_template_arrays(image))
+
+        # 金字塔各层：与 PreparedTemplate.pyramid_level 相同的面积平均缩小
+        entry['levels'] = {}
+        for level in range(1, pyramid_levels + 1):
+            if min(image.shape[:2]) // 2 ** level < MIN_PYRAMID_SIZE:
+                break
+            entry['levels'][str(level)] = add_template(_template_arrays(downsample(image, 2 ** level)))
+
+        templates[image_path.relative_to(directory).with_suffix('').as_posix()] = entry
+
+    header = json.dumps({'templates': templates}, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for array_offset, array in arrays:
+            f.seek(data_start + array_offset)
+            f.write(array.data)
+        f.truncate(data_start + offset)
+
+    return TemplateLibrary(path)
+
+
+class TemplateLibrary:
+    """
+    由 build_library 编译的模板库。
+
+    打开时只读取 JSON 索引，数据区在首次访问模板时才以只读 np.memmap 映射，
+    各模板数组都是映射上的视图，不解码图片、不复制数据；多个进程映射同一文件时共享操作系统页缓存。
+
+    library[name] 返回模板的 RGB (带透明通道时为 RGBA) 图像，可直接传给 match_image / find_all 等接口；
+    注册到 TemplateCache 后，预处理时直接使用库中的灰度、边缘和金字塔数据，只需计算与源图尺寸相关的频谱。
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): 模板库文件路径
+        """
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"文件不存在: {self.path}")
+
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是有效的模板库文件: {self.path}")
+            header_size, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+
+        self.index = header['templates']
+        self._data_start = -(-(len(MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+        self._buffer = None
+        self._images = {}   # 名称 -> RGB 图像视图，保持对象标识稳定，供 TemplateCache 按标识缓存
+        self._names = {}    # id(RGB 图像视图) -> 名称
+
+    @property
+    def names(self) -> list[str]:
+        """返回所有模板名称"""
+        return list(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """
+            获取模板的 RGB 图像 (只读内存映射视图)
+        """
+        if name not in self._images:
+            if name not in self.index:
+                raise KeyError(f"模板库中不存在模板: {name}")
+            image = self._array(self.index[name]['image'])
+            self._images[name] = image
+            self._names[id(image)] = name
+        return self._images[name]
+
+    def name_of(self, image: np.ndarray) -> str | None:
+        """
+            返回由本库取出的模板图像对应的名称，不是本库的图像时返回 None
+        """
+        name = self._names.get(id(image))
+        if name is not None and self._images[name] is image:
+            return name
+        return None
+
+    def prepare(self, image: np.ndarray, source_shape: tuple[int, int],
+                mask: np.ndarray = None, fft: FFTEngine = None) -> PreparedTemplate | None:
+        """
+            使用库中预先计算的数据创建预处理模板
+        Args:
+            image (np.ndarray): 由 library[name] 取出的模板图像
+            source_shape (tuple): 源图尺寸 (height, width)
+            mask (np.ndarray): 显式掩码，None 时使用库中 RGBA 模板的 alpha 通道
+            fft (FFTEngine): FFT 后端
+        Returns:
+            PreparedTemplate | None: 预处理模板，image 不属于本库时返回 None
+        """
+        name = self.name_of(image)
+        if name is None:
+            return None
+        entry = self.index[name]
+        precomputed = self._precomputed(entry)
+        precomputed['levels'] = {
+            int(level): dict(self._precomputed(coarse), image=self._array(coarse['image']))
+            for level, coarse in entry['levels'].items()
+        }
+        return PreparedTemplate(image, source_shape, precomputed, mask, fft)
+
+    def _precomputed(self, entry: dict) -> dict:
+        return {'gray': self._array(entry['gray']), 'edges': self._array(entry['edges']), 'norm': entry['norm']}
+
+    def _array(self, entry: dict) -> np.ndarray:
+        """
+        按索引条目从内存映射中取出数组视图，首次调用时才映射文件
+        """
+        if self._buffer is None:
+            self._buffer = np.memmap(self.path, dtype=np.uint8, mode='r')
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        start = self._data_start + entry['offset']
+        size = int(np.prod(shape)) * dtype.itemsize
+        return self._buffer[start:start + size].view(dtype).reshape(shape)
@@ -0,0 +1,451 @@
+import numpy as np
+from scipy import ndimage
+from scipy.signal import correlate
+
+from ..utils import DataHeader, IntegralImage
+from .fft import FFTEngine, DEFAULT_ENGINE
+from .template import PreparedTemplate, edge_detection
+
+
+def source_spectrum(s_channel: np.ndarray, fft_shape: tuple[int, int], fft: FFTEngine = None) -> np.ndarray:
+    """
+        计算源图灰度平面在 fft_shape 下的 rfft2 频谱，可供同 FFT 尺寸的多个模板共用
+    Args:
+        s_channel (np.ndarray): 源图灰度平面 (float32)
+        fft_shape (tuple): FFT 尺寸
+        fft (FFTEngine): FFT 后端，应与模板使用的后端一致
+    Returns:
+        np.ndarray: 源图频谱
+    """
+    return (fft or DEFAULT_ENGINE).rfft2(s_channel, fft_shape)
+
+
+def squared_spectrum(s_channel: np.ndarray, fft_shape: tuple[int, int], fft: FFTEngine = None) -> np.ndarray:
+    """
+        计算源图灰度平方 (float64) 在 fft_shape 下的 rfft2 频谱，供掩码模板计算加权局部能量
+    """
+    return (fft or DEFAULT_ENGINE).rfft2(np.square(s_channel, dtype=np.float64), fft_shape)
+
+
+def ncc_map(s_channel: np.ndarray, template: PreparedTemplate, spectrum: np.ndarray = None,
+            energy: IntegralImage = None, s_squared_spectrum: np.ndarray = None,
+            sums: IntegralImage = None) -> np.ndarray:
+    """
+        计算灰度源图与预处理模板的归一化互相关(NCC)结果图，去均值模板 (template.zero_mean) 时为 TM_CCOEFF_NORMED 式得分
+    Args:
+        s_channel (np.ndarray): 源图灰度平面 (float32)
+        template (PreparedTemplate): 预处理模板，其 source_shape 需与源图一致
+        spectrum (np.ndarray): source_spectrum() 的结果，不提供时现场计算
+        energy (IntegralImage): 源图平方的积分图，不提供时现场计算 (仅无掩码模板使用)
+        s_squared_spectrum (np.ndarray): squared_spectrum() 的结果，不提供时现场计算 (仅掩码模板使用)
+        sums (IntegralImage): 源图的积分图，不提供时现场计算 (仅无掩码的去均值模板使用)
+    Returns:
+        np.ndarray: valid 区域的 NCC 结果图
+    """
+    if spectrum is None:
+        spectrum = source_spectrum(s_channel, template.fft_shape, template.fft)
+
+    # 分子：互相关 (频谱相乘 + 逆 FFT)；去均值模板的分子即 Σ (T - T̄)·S，无需对源图去均值
+    numerator = template.correlate(spectrum)
+
+    if template.mask is None:
+        if energy is None:
+            energy = IntegralImage(np.square(s_channel))
+        if not template.zero_mean:
+            # 分母：局部能量 (积分图窗口和) × 模板能量
+            return _normalize(numerator, energy.box_sum(*template.shape), template.norm)
+        # 去均值：窗口方差和 Σ S² - (Σ S)² / n 同样由积分图得到
+        if sums is None:
+            sums = IntegralImage(s_channel)
+        h, w = template.shape
+        s_sum = sums.box_sum(h, w)
+        return _normalize_centered(numerator, energy.box_sum(h, w), s_sum, template.norm, h * w)
+
+    # 掩码模板：局部能量为掩码与源图平方的互相关
+    if s_squared_spectrum is None:
+        s_squared_spectrum = squared_spectrum(s_channel, template.fft_shape, template.fft)
+    s_squared = template.masked_energy(s_squared_spectrum)
+    if not template.zero_mean:
+        return _normalize(numerator, s_squared, template.norm)
+    # 去均值的掩码模板：加权窗口和 Σ w·S 为掩码与源图的互相关 (float64，避免相减时损失精度)
+    s_sum = template.masked_energy(template.fft.rfft2(s_channel.astype(np.float64), template.fft_shape))
+    return _normalize_centered(numerator, s_squared, s_sum, template.norm, _mask_weight(template))
+
+
+def ncc_region(s_channel: np.ndarray, template: PreparedTemplate,
+               x0: int, y0: int, x1: int, y1: int) -> tuple[np.ndarray, int, int]:
+    """
+        只在左上角位于 [x0, x1] × [y0, y1] 的小范围内直接计算 NCC，不依赖整图频谱
+    Args:
+        s_channel (np.ndarray): 源图灰度平面 (float32)
+        template (PreparedTemplate): 预处理模板
+        x0, y0, x1, y1 (int): 左上角坐标的搜索范围 (闭区间)，超出源图的部分会被裁掉
+    Returns:
+        tuple[np.ndarray, int, int]: (NCC 结果图, 结果图原点在源图中的 x, y)
+    """
+    h, w = template.shape
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(s_channel.shape[1] - w, x1), min(s_channel.shape[0] - h, y1)
+    if x1 < x0 or y1 < y0:
+        return np.zeros((0, 0), dtype=np.float32), x0, y0
+
+    region = s_channel[y0:y1 + h, x0:x1 + w]
+    if template.mask is None:
+        numerator = correlate(region, template.gray, mode='valid')
+        s_squared = IntegralImage(np.square(region)).box_sum(h, w)
+        if template.zero_mean:
+            s_sum = IntegralImage(region).box_sum(h, w)
+            return _normalize_centered(numerator, s_squared, s_sum, template.norm, h * w), x0, y0
+        return _normalize(numerator, s_squared, template.norm), x0, y0
+
+    numerator = correlate(region, template.gray * template.mask, mode='valid')
+    s_squared = correlate(np.square(region, dtype=np.float64), template.mask, mode='valid')
+    if template.zero_mean:
+        s_sum = correlate(region.astype(np.float64), template.mask, mode='valid')
+        return _normalize_centered(numerator, s_squared, s_sum, template.norm, _mask_weight(template)), x0, y0
+    return _normalize(numerator, s_squared, template.norm), x0, y0
+
+
+def _normalize(numerator: np.ndarray, s_squared: np.ndarray, t_norm: float) -> np.ndarray:
+    """
+    互相关除以 局部能量 × 模板能量 (掩码模板时为加权局部能量)。
+    FFT 舍入误差在全黑 (或掩码区域几乎全黑) 的窗口中会被放大为极大的得分，
+    这些窗口直接置 0，其余结果按柯西-施瓦茨不等式限制在 [-1, 1]
+    """
+    denominator = np.sqrt(np.maximum(s_squared, 0)) * t_norm
+
+    denominator[denominator == 0] = 1e-8  # 避免除零
+
+    ncc = numerator / denominator
+    ncc[s_squared < 1e-3] = 0
+    return np.clip(ncc, -1, 1, out=ncc)
+
+
+def _normalize_centered(numerator: np.ndarray, s_squared: np.ndarray, s_sum: np.ndarray,
+                        t_norm: float, weight: float) -> np.ndarray:
+    """
+    去均值 NCC 的归一化：Σ (T - T̄)·S / (‖T - T̄‖ × sqrt(Σ S² - (Σ S)² / n))，n 为窗口像素数 (掩码时为权重和)。
+    窗口方差接近 0 (平坦区域，每像素方差低于 0.01) 时分母只剩舍入误差，直接置 0，其余结果限制在 [-1, 1]。
+    三个输入都是新分配的数组，原地计算以减少整图大小的临时数组
+    """
+    # 窗口方差和 Σ S² - (Σ S)² / n
+    s_var = s_squared
+    s_sum *= s_sum
+    s_sum /= weight
+    s_var -= s_sum
+
+    flat = s_var < 1e-2 * weight
+    np.maximum(s_var, 1e-2 * weight, out=s_var)     # 平坦窗口稍后置 0，这里只避免除零
+    np.sqrt(s_var, out=s_var)
+    s_var *= t_norm
+
+    ncc = np.divide(numerator, s_var, out=numerator, casting='same_kind')
+    ncc[flat] = 0
+    return np.clip(ncc, -1, 1, out=ncc)
+
+
+def _window_root(s_squared: np.ndarray, s_sum: np.ndarray = None,
+                 weight: float = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    掩码 NCC 的窗口分母 sqrt(Σ w·S²)，提供 s_sum 时为去均值的 sqrt(Σ w·S² - (Σ w·S)² / n)，
+    以及按 _normalize / _normalize_centered 的规则需置 0 的窗口，供多个模板共用
+    """
+    if s_sum is None:
+        invalid = s_squared < 1e-3
+        floor = 1e-16
+    else:
+        s_squared = s_squared - np.square(s_sum) / weight
+        invalid = s_squared < 1e-2 * weight
+        floor = 1e-2 * weight
+    return np.sqrt(np.maximum(s_squared, floor)).astype(np.float32), invalid
+
+
+def _mask_weight(template: PreparedTemplate) -> float:
+    """
+    掩码权重和 Σ w，即加权窗口的等效像素数
+    """
+    return max(float(np.sum(template.mask, dtype=np.float64)), 1e-8)
+
+
+def edge_similarity(source_image: np.ndarray, template: PreparedTemplate, x: int, y: int) -> float:
+    """
+        计算源图 (x, y) 处区域与模板的边缘相似度
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板
+        x (int): 区域左上角 x 坐标
+        y (int): 区域左上角 y 坐标
+    Returns:
+        float: 边缘相似度
+    """
+    h, w = template.shape
+    matched_region = source_image[y:y+h, x:x+w]
+    matched_edges = edge_detection(DataHeader().rgb_to_gray(matched_region))
+    if template.mask is not None:
+        matched_edges *= template.mask   # 透明区域的边缘不参与比较
+
+    target_edges = template.edges
+    edge_numerator = np.sum(target_edges * matched_edges)
+    edge_denominator = np.sqrt(np.sum(target_edges**2) * np.sum(matched_edges**2))
+    edge_denominator = max(edge_denominator, 1e-8)  # 避免除零
+    return float(edge_numerator / edge_denominator)
+
+
+def locate_best(source_image: np.ndarray, template: PreparedTemplate, ncc: np.ndarray,
+                similarity: float = 0.8) -> tuple[tuple, float]:
+    """
+        在 NCC 结果图中取最佳位置，并使用边缘检测进行二次验证
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板
+        ncc (np.ndarray): NCC 结果图
+        similarity (float): 相似度阈值
+    Returns:
+        tuple[tuple[int, int], float]: 匹配中心坐标 (相对源图) 和相似度
+    """
+    # 左上角坐标
+    y, x = np.unravel_index(np.argmax(ncc), ncc.shape)
+    return verify_hit(source_image, template, int(x), int(y), float(ncc[y, x]), similarity)
+
+
+def verify_hit(source_image: np.ndarray, template: PreparedTemplate, x: int, y: int,
+               score: float, similarity: float = 0.8) -> tuple[tuple, float]:
+    """
+        对左上角位于 (x, y)、NCC 得分为 score 的候选位置做阈值判断和边缘检测二次验证；
+        去均值模板的得分本身已足够区分平坦区域，跳过边缘验证
+    Returns:
+        tuple[tuple[int, int], float]: 匹配中心坐标 (相对源图) 和相似度
+    """
+    if score >= similarity:
+        # 只有当边缘相似度也达到阈值时，才认为匹配成功
+        if template.zero_mean or edge_similarity(source_image, template, x, y) >= similarity:
+            # 中心坐标
+            h, w = template.shape
+            center_x = x + w // 2
+            center_y = y + h // 2
+            return (int(center_x), int(center_y)), round(float(score), 3)
+
+    return (False, False), round(float(score), 3)
+
+
+def find_peaks(ncc: np.ndarray, threshold: float, max_results: int = None,
+               min_distance: int = 1) -> list[tuple[int, int, float]]:
+    """
+        非极大值抑制：取 NCC 结果图中不低于 threshold 的局部极大值
+    Args:
+        ncc (np.ndarray): NCC 结果图
+        threshold (float): 得分阈值
+        max_results (int): 最多返回数量，None 表示不限
+        min_distance (int): 两个峰值之间的最小距离 (切比雪夫距离，像素)
+    Returns:
+        list[tuple[int, int, float]]: (x, y, score) 列表，按得分降序
+    """
+    if ncc.size == 0:
+        return []
+    size = 2 * max(min_distance, 1) + 1
+    peaks = (ncc == ndimage.maximum_filter(ncc, size=size, mode='nearest')) & (ncc >= threshold)
+    ys, xs = np.nonzero(peaks)
+    scores = ncc[ys, xs]
+    order = np.argsort(scores, kind='stable')[::-1]
+    ys, xs, scores = ys[order], xs[order], scores[order]
+
+    # 得分相同的平台区域可能留下相邻的多个峰，再按距离做一次筛选
+    kept = []
+    kept_ys, kept_xs = np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    for y, x, score in zip(ys, xs, scores):
+        if kept and np.any(np.maximum(np.abs(kept_ys - y), np.abs(kept_xs - x)) < min_distance):
+            continue
+        kept.append((int(x), int(y), float(score)))
+        kept_ys, kept_xs = np.append(kept_ys, y), np.append(kept_xs, x)
+        if max_results is not None and len(kept) >= max_results:
+            break
+    return kept
+
+
+def find_all_ncc(source_image: np.ndarray, template: PreparedTemplate, similarity: float = 0.8,
+                 max_results: int = None, min_distance: int = None,
+                 s_channel: np.ndarray = None) -> list[tuple[tuple, float]]:
+    """
+        计算一次 NCC 结果图，返回所有超过阈值且通过边缘验证的匹配位置
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板
+        similarity (float): 相似度阈值
+        max_results (int): 最多返回数量，None 表示不限
+        min_distance (int): 两个匹配之间的最小距离，默认取模板短边的一半
+        s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+    Returns:
+        list[tuple[tuple[int, int], float]]: 匹配中心坐标 (相对源图) 和相似度列表，按相似度降序
+    """
+    if template.norm == 0 or not template.fits(source_image.shape):
+        return []
+    if min_distance is None:
+        min_distance = max(min(template.shape) // 2, 1)
+
+    if s_channel is None:
+        s_channel = DataHeader().rgb_to_gray(source_image)
+    ncc = ncc_map(s_channel, template)
+
+    results = []
+    for x, y, score in find_peaks(ncc, similarity, None, min_distance):
+        (cx, cy), sim = verify_hit(source_image, template, x, y, score, similarity)
+        if cx is not False:
+            results.append(((cx, cy), sim))
+            if max_results is not None and len(results) >= max_results:
+                break
+    return results
+
+
+def match_ncc(source_image: np.ndarray, template: PreparedTemplate,
+              similarity: float = 0.8, s_channel: np.ndarray = None) -> tuple[tuple, float]:
+    """
+        使用 FFT 加速的归一化互相关(NCC)方法匹配图像 (灰度)，并使用边缘检测进行二次验证。
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板
+        similarity (float): 相似度阈值
+        s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+    Returns:
+        tuple[tuple[int, int], float]: 匹配中心坐标 (相对源图) 和相似度
+    """
+    return match_ncc_many(source_image, [template], similarity, s_channel)[0]
+
+
+def match_ncc_scales(source_image: np.ndarray, template: PreparedTemplate, scales: list[float],
+                     similarity: float = 0.8, s_channel: np.ndarray = None) -> tuple[tuple, float, float]:
+    """
+        多尺度匹配：在模板的尺度库中逐个比例匹配，源图灰度、频谱和局部能量积分图只计算一次
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板 (原始比例)
+        scales (list[float]): 缩放比例列表
+        similarity (float): 相似度阈值
+        s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+    Returns:
+        tuple[tuple[int, int], float, float]: 匹配中心坐标 (相对源图)、缩放比例和相似度；
+                                              未匹配时坐标为 (False, False)，比例为得分最高的比例
+    """
+    scaled = [template.scaled(scale) for scale in scales]
+    results = match_ncc_many(source_image, scaled, similarity, s_channel)
+    return best_scale(results, scales)
+
+
+def rotation_angles(rotations: list[float] | int) -> list[float]:
+    """
+        旋转角度列表：整数 n 表示把一周等分为 n 个角度 (如 36 即每 10 度)，列表原样返回
+    """
+    if isinstance(rotations, int):
+        if rotations <= 0:
+            raise ValueError(f"rotations 必须大于 0，当前 rotations={rotations}")
+        return [i * 360 / rotations for i in range(rotations)]
+    rotations = [float(angle) for angle in rotations]
+    if not rotations:
+        raise ValueError("rotations 不能为空")
+    return rotations
+
+
+def match_ncc_rotations(source_image: np.ndarray, template: PreparedTemplate, angles: list[float],
+                        similarity: float = 0.8, s_channel: np.ndarray = None) -> tuple[tuple, float, float]:
+    """
+        旋转匹配：在模板的旋转库中逐个角度匹配，源图灰度、频谱和源图平方的频谱只计算一次；
+        旋转库各角度共用圆形掩码时加权局部能量 (及其开方) 也只计算一次，每多一个角度只需一次频谱相乘和一次逆 FFT
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        template (PreparedTemplate): 预处理模板 (未旋转)
+        angles (list[float]): 逆时针旋转角度列表 (度)
+        similarity (float): 相似度阈值
+        s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+    Returns:
+        tuple[tuple[int, int], float, float]: 匹配中心坐标 (相对源图)、旋转角度和相似度；
+                                              未匹配时坐标为 (False, False)，角度为得分最高的角度
+    """
+    bank = [template.rotated(angle) for angle in angles]
+    results = [((False, False), 0.0)] * len(bank)
+    if not bank[0].fits(source_image.shape):
+        return best_scale(results, angles)
+    if s_channel is None:
+        s_channel = DataHeader().rgb_to_gray(source_image)
+
+    fft, fft_shape = bank[0].fft, bank[0].fft_shape
+    spectrum = source_spectrum(s_channel, fft_shape, fft)
+    s_squared_spectrum = squared_spectrum(s_channel, fft_shape, fft)
+    sum_spectrum = None
+    windows = {}    # id(掩码) -> 窗口分母 sqrt(Σ w·S²) (去均值时为加权标准差项) 及需置 0 的窗口
+    for index, rotated in enumerate(bank):
+        if rotated.norm == 0:
+            continue
+        key = id(rotated.mask_source)
+        if key not in windows:
+            s_squared = rotated.masked_energy(s_squared_spectrum)
+            if rotated.zero_mean:
+                if sum_spectrum is None:
+                    sum_spectrum = fft.rfft2(s_channel.astype(np.float64), fft_shape)
+                s_sum = rotated.masked_energy(sum_spectrum)
+                windows[key] = _window_root(s_squared, s_sum, _mask_weight(rotated))
+            else:
+                windows[key] = _window_root(s_squared)
+        root, invalid = windows[key]
+
+        # 与 _normalize / _normalize_centered 结果相同，但各角度共用开方后的分母
+        ncc = rotated.correlate(spectrum)
+        ncc /= root
+        ncc *= 1 / rotated.norm
+        ncc[invalid] = 0
+        np.clip(ncc, -1, 1, out=ncc)
+        results[index] = locate_best(source_image, rotated, ncc, similarity)
+    return best_scale(results, angles)
+
+
+def best_scale(results: list[tuple[tuple, float]], scales: list[float]) -> tuple[tuple, float, float]:
+    """
+    从各比例 (或各角度) 的匹配结果中取最佳：优先取通过验证的结果，其次取得分最高的比例
+    """
+    best = None
+    for ((cx, cy), sim), scale in zip(results, scales):
+        candidate = ((cx, cy), scale, sim)
+        if best is None or (cx is not False, sim) > (best[0][0] is not False, best[2]):
+            best = candidate
+    return best
+
+
+def match_ncc_many(source_image: np.ndarray, templates: list[PreparedTemplate],
+                   similarity: float = 0.8, s_channel: np.ndarray = None) -> list[tuple[tuple, float]]:
+    """
+        在同一源图上匹配多个模板，源图灰度、局部能量积分图只计算一次，频谱按 FFT 尺寸分组只计算一次
+    Args:
+        source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+        templates (list[PreparedTemplate]): 预处理模板列表
+        similarity (float): 相似度阈值
+        s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+    Returns:
+        list[tuple[tuple[int, int], float]]: 与模板一一对应的匹配结果
+    """
+    if s_channel is None:
+        s_channel = DataHeader().rgb_to_gray(source_image)
+    # 源图局部能量 (及去均值模板使用的源图) 的积分图，所有无掩码模板共用
+    energy = sums = None
+
+    # 按 FFT 尺寸 (和后端) 分组，同组模板共用一份源图频谱 (掩码模板另外共用一份源图平方的频谱)
+    groups = {}
+    for index, template in enumerate(templates):
+        groups.setdefault((template.fft_shape, template.fft), []).append(index)
+
+    results = [((False, False), 0.0)] * len(templates)
+    for (fft_shape, fft), indexes in groups.items():
+        spectrum = s_squared_spectrum = None
+        for index in indexes:
+            template = templates[index]
+            if template.norm == 0 or not template.fits(source_image.shape):
+                continue
+            if spectrum is None:
+                spectrum = source_spectrum(s_channel, fft_shape, fft)
+            if template.mask is None and energy is None:
+                energy = IntegralImage(np.square(s_channel))
+            if template.mask is None and template.zero_mean and sums is None:
+                sums = IntegralImage(s_channel)
+            if template.mask is not None and s_squared_spectrum is None:
+                s_squared_spectrum = squared_spectrum(s_channel, fft_shape, fft)
+            ncc = ncc_map(s_channel, template, spectrum, energy, s_squared_spectrum, sums)
+            results[index] = locate_best(source_image, template, ncc, similarity)
+
+    return results
@@ -0,0 +1,188 @@
+import numpy as np
+
+from ..utils import POPCOUNT
+from .color import color_mask
+
+
+def binarize(image: np.ndarray, colors: list[str | tuple], similarity: float = 0.8) -> np.ndarray:
+    """
+        按颜色容差二值化：与任一文字颜色相似的像素为前景
+    Args:
+        image (np.ndarray): RGB 图像 (H, W, 3)
+        colors (list): 文字颜色列表，元素为十六进制字符串或 (r, g, b) 元组
+        similarity (float): 相似度阈值，同 find_colors
+    Returns:
+        np.ndarray: 布尔掩码 (H, W)
+    """
+    return color_mask(image, colors, similarity)
+
+
+def segment_columns(mask: np.ndarray) -> list[tuple[int, int]]:
+    """
+        按列投影切分字符：连续的非空列为一个字符，字符之间至少隔一列空白
+    Args:
+        mask (np.ndarray): 二值掩码 (H, W)
+    Returns:
+        list[tuple[int, int]]: 各字符的列范围 [x1, x2)，从左到右排列
+    """
+    columns = np.zeros(mask.shape[1] + 2, dtype=np.int8)
+    columns[1:-1] = mask.any(axis=0)
+    # 投影的上升沿和下降沿即字符的起止列
+    edges = np.flatnonzero(np.diff(columns))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def text_rows(mask: np.ndarray) -> tuple[int, int]:
+    """
+        按行投影求文字行的上下边界
+    Args:
+        mask (np.ndarray): 二值掩码 (H, W)
+    Returns:
+        tuple[int, int]: 行范围 [y1, y2)，没有前景时为 (0, 0)
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return 0, 0
+    return int(rows[0]), int(rows[-1]) + 1
+
+
+class GlyphDict:
+    """
+    字库：把单行文字 (数字、计数器、计时器、短标签) 的每个字符归一化为固定尺寸的点阵，
+    按位打包后与字库中的点阵比较汉明距离 (异或 + 查表计数)，取距离最小的字符。
+
+    识别流程全部是向量化的 numpy 运算：按颜色二值化 → 行投影求文字行 → 列投影切分字符 →
+    最近邻缩放到 cell 尺寸并打包 → 与整个字库一次性求汉明距离。
+    字符在纵向上按整行高度归一化，'.'、'-'、':' 等小字符保留其在行内的位置。
+
+    字库由已知文字的样例截图生成 (add_sample)，也可逐个添加字符点阵 (add)，可用 save / load 保存为 npz 文件。
+    只支持单行文字，粘连的字符 (之间没有空白列) 会被当作一个字符。
+    """
+    def __init__(self, cell: tuple[int, int] = (16, 12), max_distance: float = 0.25):
+        """
+        Args:
+            cell (tuple): 归一化点阵尺寸 (height, width)
+            max_distance (float): 最大汉明距离，占点阵位数的比例，超过时视为无法识别
+        """
+        self.cell = tuple(cell)
+        self.max_distance = max_distance
+        self.chars = []
+        self.bits = np.zeros((0, self._nbytes), dtype=np.uint8)
+        self.version = 0    # 每次修改字库时递增，供帧差门控区分字库内容
+
+    @property
+    def _nbytes(self) -> int:
+        return -(-self.cell[0] * self.cell[1] // 8)
+
+    def __len__(self) -> int:
+        return len(self.chars)
+
+    def __repr__(self) -> str:
+        return f"GlyphDict(cell={self.cell}, chars={''.join(sorted(set(self.chars)))!r})"
+
+    def pack(self, glyph: np.ndarray) -> np.ndarray:
+        """
+            把单个字符的二值点阵最近邻缩放到 cell 尺寸并按位打包
+        Args:
+            glyph (np.ndarray): 字符点阵 (h, w)，纵向应为整行高度
+        Returns:
+            np.ndarray: 打包后的 uint8 数组
+        """
+        height, width = glyph.shape
+        ch, cw = self.cell
+        ys = (np.arange(ch) * height + height // 2) // ch
+        xs = (np.arange(cw) * width + width // 2) // cw
+        return np.packbits(glyph[ys[:, None], xs])
+
+    def add(self, char: str, glyph: np.ndarray) -> None:
+        """
+            添加一个字符点阵，同一字符可添加多个样式
+        Args:
+            char (str): 字符
+            glyph (np.ndarray): 字符的二值点阵 (h, w)，纵向应为整行高度
+        """
+        self.chars.append(char)
+        self.bits = np.vstack([self.bits, self.pack(np.asarray(glyph, dtype=bool))])
+        self.version += 1
+
+    def add_sample(self, image: np.ndarray, text: str, colors: list[str | tuple],
+                   similarity: float = 0.8) -> None:
+        """
+            从已知文字的样例截图中切分字符并加入字库
+        Args:
+            image (np.ndarray): 样例截图 (RGB)，只含一行文字，如 '0123456789'
+            text (str): 截图中的文字，空格被忽略
+            colors (list): 文字颜色列表
+            similarity (float): 颜色相似度阈值
+        """
+        mask = binarize(image, colors, similarity)
+        y1, y2 = text_rows(mask)
+        segments = segment_columns(mask)
+        chars = [c for c in text if not c.isspace()]
+        if len(segments) != len(chars):
+            raise ValueError(f"样例中切分出 {len(segments)} 个字符，与 text 中的 {len(chars)} 个字符不一致")
+        for char, (x1, x2) in zip(chars, segments):
+            self.add(char, mask[y1:y2, x1:x2])
+
+    def recognize(self, mask: np.ndarray) -> list[tuple[str, tuple[int, int, int, int], float]]:
+        """
+            识别二值掩码中的单行文字
+        Args:
+            mask (np.ndarray): 二值掩码 (H, W)
+        Returns:
+            list[tuple[str, tuple, float]]: [(字符, 区域 (x1, y1, x2, y2), 汉明距离占比), ...]，从左到右；
+                                            无法识别的字符为 None
+        """
+        y1, y2 = text_rows(mask)
+        segments = segment_columns(mask)
+        if not segments or not self.chars:
+            return []
+
+        glyphs = np.stack([self.pack(mask[y1:y2, x1:x2]) for x1, x2 in segments])
+        # (字符数, 字库大小, 字节数) 的异或，查表计数后求和即汉明距离
+        distance = POPCOUNT[glyphs[:, None, :] ^ self.bits[None, :, :]].sum(axis=2)
+        best = distance.argmin(axis=1)
+        ratio = distance[np.arange(len(segments)), best] / (self.cell[0] * self.cell[1])
+
+        results = []
+        for (x1, x2), index, r in zip(segments, best.tolist(), ratio.tolist()):
+            char = self.chars[index] if r <= self.max_distance else None
+            results.append((char, (x1, y1, x2, y2), round(r, 3)))
+        return results
+
+    def read(self, mask: np.ndarray, unknown: str = '', space_gap: int = None) -> str:
+        """
+            识别二值掩码中的单行文字并拼接为字符串
+        Args:
+            mask (np.ndarray): 二值掩码 (H, W)
+            unknown (str): 无法识别的字符替换为该字符串，默认丢弃
+            space_gap (int): 相邻字符间空白列数不小于该值时插入空格，None 表示不插入
+        Returns:
+            str: 识别结果
+        """
+        text = []
+        previous = None
+        for char, (x1, _, x2, _), _ in self.recognize(mask):
+            if space_gap is not None and previous is not None and x1 - previous >= space_gap:
+                text.append(' ')
+            text.append(char if char is not None else unknown)
+            previous = x2
+        return ''.join(text)
+
+    def save(self, path: str) -> None:
+        """
+            保存字库为 npz 文件
+        """
+        np.savez(path, chars=np.array(self.chars, dtype=str), bits=self.bits,
+                 cell=np.array(self.cell), max_distance=self.max_distance)
+
+    @classmethod
+    def load(cls, path: str) -> 'GlyphDict':
+        """
+            加载 save() 保存的字库
+        """
+        with np.load(path) as data:
+            glyphs = cls(tuple(data['cell'].tolist()), float(data['max_distance']))
+            glyphs.chars = data['chars'].tolist()
+            glyphs.bits = data['bits']
+        return glyphs
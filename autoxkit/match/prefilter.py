@@ -0,0 +1,101 @@
+import numpy as np
+
+from .template import PreparedTemplate
+
+
+class ColorPrefilter:
+    """
+    颜色直方图预筛选：在 FFT 找图之前，比较区域与模板的量化颜色直方图，
+    模板中有较多像素的颜色在区域内根本不存在 (数量不足) 时，判定模板不可能出现，直接返回未找到。
+
+    适合 "对话框是否出现" 这类多数时候答案为否的检查：区域直方图只需一次量化和 bincount，
+    模板直方图缓存在预处理模板上。判定只依赖颜色包含关系，与模板位置无关；
+    模板颜色在界面上会整体变化 (主题、透明叠加) 时应调大 tolerance 或不使用预筛选。
+
+    checks / rejects / passes / hits 统计预筛选的调用、拒绝、放行次数，以及放行后确实找到目标的次数，
+    info() 给出拒绝率与放行命中率，用于调整 bins 和 tolerance。
+    """
+    def __init__(self, bins: int = 4, tolerance: float = 0.3):
+        """
+        Args:
+            bins (int): 每个通道的量化级数，默认 4 (共 64 个颜色格)
+            tolerance (float): 允许在区域中找不到对应颜色的模板像素比例，超过时拒绝，默认 0.3
+        """
+        if not 1 <= bins <= 256:
+            raise ValueError(f"bins 必须在 1 ~ 256 之间，当前 bins={bins}")
+        self.bins = bins
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        """
+            清空统计
+        """
+        self.checks = 0     # 预筛选次数
+        self.rejects = 0    # 拒绝次数 (跳过 FFT 找图)
+        self.passes = 0     # 放行次数
+        self.hits = 0       # 放行后找到目标的次数
+
+    def missing(self, histogram: np.ndarray, template: PreparedTemplate, scale: float = 1.0) -> float:
+        """
+            计算模板像素中无法由区域颜色解释的比例
+        Args:
+            histogram (np.ndarray): 区域的量化颜色直方图
+            template (PreparedTemplate): 预处理模板
+            scale (float): 模板缩放比例，模板各颜色的像素数按 scale² 换算
+        Returns:
+            float: 0 ~ 1 的比例
+        """
+        signature = template.color_histogram(self.bins)
+        total = signature.sum()
+        if total == 0:
+            return 0.0
+        needed = signature * (scale * scale)
+        return float(np.maximum(needed - histogram, 0).sum() / (total * scale * scale))
+
+    def check(self, histogram: np.ndarray, template: PreparedTemplate, scale: float = 1.0) -> bool:
+        """
+            判断区域是否可能包含模板，并计入统计
+        Args:
+            histogram (np.ndarray): 区域的量化颜色直方图
+            template (PreparedTemplate): 预处理模板
+            scale (float): 模板缩放比例 (多尺度匹配时取最小比例)
+        Returns:
+            bool: True 表示放行 (需要继续找图)，False 表示拒绝
+        """
+        self.checks += 1
+        if self.missing(histogram, template, scale) > self.tolerance:
+            self.rejects += 1
+            return False
+        self.passes += 1
+        return True
+
+    def record(self, found: bool) -> None:
+        """
+            记录放行后的找图结果
+        """
+        if found:
+            self.hits += 1
+
+    @property
+    def reject_rate(self) -> float:
+        """返回拒绝率"""
+        return self.rejects / self.checks if self.checks else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """返回放行命中率：放行的区域中确实找到目标的比例，越低说明预筛选越宽松"""
+        return self.hits / self.passes if self.passes else 0.0
+
+    def info(self) -> dict:
+        """
+            返回统计：预筛选、拒绝、放行、放行后命中次数，以及拒绝率和放行命中率
+        """
+        return {
+            'checks': self.checks,
+            'rejects': self.rejects,
+            'passes': self.passes,
+            'hits': self.hits,
+            'reject_rate': self.reject_rate,
+            'hit_rate': self.hit_rate,
+        }
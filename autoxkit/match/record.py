@@ -0,0 +1,168 @@
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ..utils import RectTuple
+from .source import SequenceFrameSource, crop_frame
+
+# 索引记录：帧所在分块、分块内偏移、尺寸、时间戳和截图区域
+INDEX_DTYPE = np.dtype([
+    ('chunk', '<i4'),
+    ('offset', '<i8'),
+    ('height', '<i4'),
+    ('width', '<i4'),
+    ('timestamp', '<f8'),
+    ('rect', '<i4', (4,)),
+])
+INDEX_FILE = 'index.bin'
+CHUNK_FILE = 'frames_{:05d}.bin'
+
+
+class FrameRecorder:
+    """
+    帧录制器：把每次截图的原始 RGB 数据追加写入分块文件，并在索引文件中记录偏移、尺寸、时间戳和区域。
+
+    录制目录结构:
+        index.bin           INDEX_DTYPE 定长记录，逐帧追加
+        frames_00000.bin    原始 uint8 数据，单个分块超过 chunk_size 后写入下一个分块
+
+    已存在的录制目录会在末尾继续追加。
+    """
+    def __init__(self, path: str, chunk_size: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path (str): 录制目录
+            chunk_size (int): 单个分块文件的最大字节数
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+
+        index_path = self.path / INDEX_FILE
+        index = np.fromfile(index_path, dtype=INDEX_DTYPE) if index_path.exists() else np.zeros(0, INDEX_DTYPE)
+        self.count = len(index)
+        self.chunk = int(index['chunk'][-1]) if self.count else 0
+        chunk_path = self.path / CHUNK_FILE.format(self.chunk)
+        self.chunk_offset = chunk_path.stat().st_size if chunk_path.exists() else 0
+
+        self._index_file = open(index_path, 'ab')
+        self._chunk_file = open(chunk_path, 'ab')
+
+    def write(self, image: np.ndarray, rect: tuple[int, int, int, int] = None, timestamp: float = None) -> None:
+        """
+            追加一帧
+        Args:
+            image (np.ndarray): RGB 图像 (H, W, 3)
+            rect (tuple): 截图区域 (x1, y1, x2, y2)，None 时记为 (0, 0, W, H)
+            timestamp (float): 时间戳，默认为当前 time.time()
+        """
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        if rect is None:
+            rect = (0, 0, width, height)
+
+        # 当前分块写满后切换到下一个分块
+        if self.chunk_offset > 0 and self.chunk_offset + image.nbytes > self.chunk_size:
+            self._chunk_file.close()
+            self.chunk += 1
+            self.chunk_offset = 0
+            self._chunk_file = open(self.path / CHUNK_FILE.format(self.chunk), 'ab')
+
+        self._chunk_file.write(image.data)
+
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record['chunk'] = self.chunk
+        record['offset'] = self.chunk_offset
+        record['height'], record['width'] = height, width
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['rect'] = tuple(rect)
+        self._index_file.write(record.tobytes())
+
+        self.chunk_offset += image.nbytes
+        self.count += 1
+
+    def flush(self) -> None:
+        """
+            把缓冲区写入磁盘
+        """
+        self._chunk_file.flush()
+        self._index_file.flush()
+
+    def close(self) -> None:
+        """
+            关闭录制文件
+        """
+        self._chunk_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ReplayFrameSource(SequenceFrameSource):
+    """
+    回放 FrameRecorder 录制的帧，帧数据通过 np.memmap 零拷贝读取，不按时间戳等待。
+
+    auto_advance 为 True 时每次 grab() 后自动切换到下一帧，与录制时的截图顺序一一对应，
+    因此按相同顺序调用匹配接口即可复现录制时的结果。
+    """
+    def __init__(self, path: str, auto_advance: bool = True, loop: bool = False):
+        """
+        Args:
+            path (str): 录制目录
+            auto_advance (bool): 每次 grab() 后是否自动切换到下一帧
+            loop (bool): 播放到最后一帧后是否回到第一帧
+        """
+        super().__init__((0, 0), loop)
+        self.path = Path(path)
+        index_path = self.path / INDEX_FILE
+        if not index_path.exists():
+            raise FileNotFoundError(f"文件不存在: {index_path}")
+        self.index_records = np.fromfile(index_path, dtype=INDEX_DTYPE)
+        self.auto_advance = auto_advance
+        self._chunks = {}
+        self._finished = False
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """返回所有帧的时间戳"""
+        return self.index_records['timestamp']
+
+    @property
+    def rects(self) -> np.ndarray:
+        """返回所有帧的截图区域 (N, 4)"""
+        return self.index_records['rect']
+
+    def __len__(self) -> int:
+        return len(self.index_records)
+
+    def frame(self, index: int) -> np.ndarray:
+        record = self.index_records[index]
+        chunk = int(record['chunk'])
+        if chunk not in self._chunks:
+            self._chunks[chunk] = np.memmap(self.path / CHUNK_FILE.format(chunk), dtype=np.uint8, mode='r')
+        height, width = int(record['height']), int(record['width'])
+        offset = int(record['offset'])
+        return self._chunks[chunk][offset:offset + height * width * 3].reshape(height, width, 3)
+
+    def seek(self, index: int) -> None:
+        super().seek(index)
+        self._finished = False
+
+    def grab(self, rect: RectTuple = None) -> np.ndarray:
+        if self._finished or len(self) == 0:
+            raise EOFError("录制帧已全部回放")
+
+        frame_rect = RectTuple(*(int(v) for v in self.rects[self.index]))
+        frame = self.frame(self.index)
+        if rect is not None and tuple(rect) != tuple(frame_rect):
+            # 请求区域与录制区域不同时，只允许截取录制区域内的部分
+            frame = crop_frame(frame, rect, (frame_rect.x1, frame_rect.y1))
+
+        if self.auto_advance and not self.advance():
+            self._finished = True
+        return frame
@@ -0,0 +1,357 @@
+import numpy as np
+
+from ..utils import RectTuple, DataHeader
+from .binary import BinaryTemplate, binarize_image, match_binary_mask
+from .color import color_mask, compare_colors, multi_color_mask, mask_result, color_histogram
+from .ocr import GlyphDict, binarize
+from .ncc import (
+    match_ncc, match_ncc_many, match_ncc_scales, match_ncc_rotations, rotation_angles, best_scale, find_all_ncc,
+)
+from .prefilter import ColorPrefilter
+from .pyramid import match_pyramid
+from .template import PreparedTemplate, TemplateCache
+from .tiled import TiledNCC
+
+
+class Snapshot:
+    """
+    截图快照：截图一次，在内存中回答多次取色、比色、找色、找图查询。
+
+    所有坐标参数与返回值均为截图来源的坐标系 (Match 为屏幕坐标，WindowMatch 为窗口坐标)，
+    查询区域 rect 必须位于快照范围内。
+    """
+    def __init__(self, image: np.ndarray, origin: tuple[int, int] = (0, 0),
+                 template_cache: TemplateCache = None, tiler: TiledNCC = None,
+                 prefilter: ColorPrefilter = None):
+        """
+        Args:
+            image (np.ndarray): RGB 图像 (H, W, 3)
+            origin (tuple): 图像左上角在来源坐标系中的位置 (x, y)
+            template_cache (TemplateCache): 预处理模板缓存，通常与创建快照的 Match 共用
+            tiler (TiledNCC): 分块并行 NCC，提供时 match_image 的整图搜索按分块并行计算
+            prefilter (ColorPrefilter): 颜色直方图预筛选，提供时 match_image / find_all 先比较颜色直方图，
+                                        区域不可能包含模板时跳过 FFT 找图
+        """
+        # 只读视图，快照内容不可修改
+        self.image = np.asarray(image).view()
+        self.image.flags.writeable = False
+        self.x, self.y = origin
+        self.template_cache = template_cache if template_cache is not None else TemplateCache()
+        self.tiler = tiler
+        self.prefilter = prefilter
+        self.data_header = DataHeader()
+        self._gray = None
+        self._histograms = {}   # (区域, 量化级数) -> 颜色直方图
+
+    @property
+    def rect(self) -> RectTuple:
+        """返回快照在来源坐标系中的矩形区域"""
+        height, width = self.image.shape[:2]
+        return RectTuple(self.x, self.y, self.x + width, self.y + height)
+
+    @property
+    def gray(self) -> np.ndarray:
+        """返回灰度平面 (float32)，首次访问时直接由 uint8 图像转换，之后各次找图共用"""
+        if self._gray is None:
+            self._gray = self.data_header.rgb_to_gray(self.image)
+            self._gray.flags.writeable = False
+        return self._gray
+
+    def crop(self, rect: tuple[int, int, int, int] = None, gray: bool = False) -> tuple[np.ndarray, int, int]:
+        """
+            截取快照中的区域 (视图，不复制)
+        Args:
+            rect (tuple): 来源坐标系中的矩形区域 (x1, y1, x2, y2)，None 表示整个快照
+            gray (bool): 是否返回灰度平面
+        Returns:
+            tuple[np.ndarray, int, int]: (区域图像, 区域左上角 x, 区域左上角 y)
+        """
+        image = self.gray if gray else self.image
+        if rect is None:
+            return image, self.x, self.y
+
+        rect = RectTuple(*rect)
+        bounds = self.rect
+        if rect.x1 < bounds.x1 or rect.y1 < bounds.y1 or rect.x2 > bounds.x2 or rect.y2 > bounds.y2:
+            raise ValueError(f"rect 超出快照范围，快照区域 {bounds}，当前 rect={rect}")
+        x1, y1 = rect.x1 - self.x, rect.y1 - self.y
+        return image[y1:y1 + rect.height, x1:x1 + rect.width], rect.x1, rect.y1
+
+    def histogram(self, rect: tuple[int, int, int, int] = None, bins: int = 4) -> np.ndarray:
+        """
+            获取区域的量化颜色直方图，同一快照上按 (区域, 量化级数) 缓存
+        Args:
+            rect (tuple): 来源坐标系中的矩形区域，None 表示整个快照
+            bins (int): 每个通道的量化级数
+        Returns:
+            np.ndarray: 长度为 bins³ 的像素计数
+        """
+        key = (RectTuple(*rect) if rect is not None else None, bins)
+        if key not in self._histograms:
+            image, _, _ = self.crop(rect)
+            self._histograms[key] = color_histogram(image, bins)
+        return self._histograms[key]
+
+    def save(self, save_path: str) -> None:
+        """
+            保存快照图像
+        Args:
+            save_path (str): 保存路径，包含自定义文件名。
+        """
+        self.data_header.save_image(np.ascontiguousarray(self.image), save_path)
+
+    def get_pixel_color(self, x: int, y: int, is_return_hex: bool = False) -> str | tuple:
+        """
+            获取坐标 (x, y) 处的颜色
+        Args:
+            x (int): 坐标 x 轴
+            y (int): 坐标 y 轴
+            is_return_hex (bool, optional): 是否返回十六进制格式字符串，默认返回 RGB 元组
+        Returns:
+            str | tuple: 十六进制格式字符串，如 #FFAABB 或 (r, g, b) 元组
+        """
+        pixel_image, _, _ = self.crop((x, y, x + 1, y + 1))
+        pixel = tuple(int(c) for c in pixel_image[0, 0])
+
+        if is_return_hex:   # 返回十六进制字符串
+            return f"#{pixel[0]:02X}{pixel[1]:02X}{pixel[2]:02X}"
+        return pixel    # 返回 RGB 元组
+
+    def match_color(self, source_color: str | tuple, target_color: str | tuple, similarity: float = 0.8) -> tuple:
+        """
+            匹配颜色
+        Args:
+            source_color (str | tuple): 源颜色 (str: 颜色十六进制字符串， tuple: (r, g, b) | (x, y))
+            target_color (str | tuple): 目标颜色 (str: 颜色十六进制字符串， tuple: (r, g, b) | (x, y))
+            similarity (float): 相似度阈值，取值范围 0.0 ~ 1.0，越接近 1 越严格。默认值为 0.8。
+        Returns:
+            tuple: bool(True | False), float(相似度结果值)
+        """
+        if type(source_color) is tuple and len(source_color) == 2:
+            source_color = self.get_pixel_color(*source_color, is_return_hex=False)
+        if type(target_color) is tuple and len(target_color) == 2:
+            target_color = self.get_pixel_color(*target_color, is_return_hex=False)
+
+        return compare_colors(source_color, target_color, similarity)
+
+    def find_color(self, rect: tuple[int, int, int, int] = None, color: str | tuple = None,
+                   similarity: float = 0.8, mode: str = 'first'):
+        """
+            找色，参数与返回值同 Match.find_color，rect 为 None 时搜索整个快照
+        """
+        if color is None:
+            raise ValueError("必须提供 color 参数")
+        return self.find_colors(rect, [color], similarity, mode)
+
+    def find_colors(self, rect: tuple[int, int, int, int] = None, colors: list[str | tuple] = None,
+                    similarity: float = 0.8, mode: str = 'first'):
+        """
+            查找与任一颜色相似的像素，参数与返回值同 Match.find_colors，rect 为 None 时搜索整个快照
+        """
+        if not colors:
+            raise ValueError("必须提供 colors 参数")
+        image, x, y = self.crop(rect)
+        return mask_result(color_mask(image, colors, similarity), mode, x, y)
+
+    def find_multi_color(self, rect: tuple[int, int, int, int] = None, base_color: str | tuple = None,
+                         offsets_and_colors: list[tuple[int, int, str | tuple]] = None,
+                         similarity: float = 0.8, mode: str = 'all'):
+        """
+            多点找色，参数与返回值同 Match.find_multi_color，rect 为 None 时搜索整个快照
+        """
+        if base_color is None or offsets_and_colors is None:
+            raise ValueError("必须提供 base_color 和 offsets_and_colors 参数")
+        image, x, y = self.crop(rect)
+        mask = multi_color_mask(image, base_color, offsets_and_colors, similarity)
+        return mask_result(mask, mode, x, y)
+
+    def read_text(self, glyphs: GlyphDict = None, rect: tuple[int, int, int, int] = None,
+                  colors: list[str | tuple] = None, similarity: float = 0.8,
+                  unknown: str = '', space_gap: int = None) -> str:
+        """
+            按字库识别单行文字，参数与返回值同 Match.read_text，rect 为 None 时识别整个快照
+        """
+        if glyphs is None or not colors:
+            raise ValueError("必须提供 glyphs 和 colors 参数")
+        image, _, _ = self.crop(rect)
+        return glyphs.read(binarize(image, colors, similarity), unknown, space_gap)
+
+    def match_image(self, target_image: np.ndarray | PreparedTemplate = None, rect: tuple[int, int, int, int] = None,
+                    similarity: float = 0.8, pyramid_levels: int = 0, mask: np.ndarray = None,
+                    scales: list[float] = None, zero_mean: bool = False,
+                    rotations: list[float] | int = None) -> tuple:
+        """
+            匹配图像，参数与返回值同 Match.match_image，rect 为 None 时搜索整个快照
+        """
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
+        if scales is not None and len(scales) == 0:
+            raise ValueError("scales 不能为空")
+        if scales is not None and rotations is not None:
+            raise ValueError("scales 与 rotations 不能同时使用")
+        angles = rotation_angles(rotations) if rotations is not None else None
+        source_image, x, y = self.crop(rect)
+        if not self._prefilter_check(rect, target_image, mask, zero_mean, min(scales) if scales else 1.0,
+                                     angles[0] if angles else None):
+            if angles is not None:
+                return (False, False), angles[0], 0.0
+            return ((False, False), 0.0) if scales is None else ((False, False), scales[0], 0.0)
+        if pyramid_levels > 0:
+            s_channel = None    # 金字塔搜索只在粗层和候选窗口上转灰度
+        else:
+            s_channel, _, _ = self.crop(rect, gray=True)
+
+        if angles is not None:
+            (cx, cy), angle, sim = self._match_rotations(source_image, target_image, angles, similarity,
+                                                         pyramid_levels, s_channel, mask, zero_mean)
+        elif scales is None:
+            (cx, cy), sim = self._match_ncc(source_image, target_image, similarity, pyramid_levels, s_channel, mask,
+                                            zero_mean)
+        else:
+            (cx, cy), scale, sim = self._match_scales(source_image, target_image, scales, similarity,
+                                                       pyramid_levels, s_channel, mask, zero_mean)
+        position = (int(cx + x), int(cy + y)) if cx is not False and cy is not False else (False, False)
+        if self.prefilter is not None:
+            self.prefilter.record(position[0] is not False)
+        if angles is not None:
+            return position, angle, sim
+        return (position, sim) if scales is None else (position, scale, sim)
+
+    def match_images(self, templates: list[np.ndarray | PreparedTemplate] = None, rect: tuple[int, int, int, int] = None,
+                     similarity: float = 0.8, zero_mean: bool = False) -> list[tuple[tuple, float]]:
+        """
+            批量匹配图像，参数与返回值同 Match.match_images，rect 为 None 时搜索整个快照
+        """
+        if templates is None:
+            raise ValueError("必须提供 templates 参数")
+        source_image, x, y = self.crop(rect)
+        s_channel, _, _ = self.crop(rect, gray=True)
+        prepared = [self._resolve(t, source_image.shape, None, zero_mean) for t in templates]
+        results = []
+        for (cx, cy), sim in match_ncc_many(source_image, prepared, similarity, s_channel):
+            if cx is not False and cy is not False:
+                results.append(((int(cx + x), int(cy + y)), sim))
+            else:
+                results.append(((False, False), sim))
+        return results
+
+    def match_binary(self, target_image: np.ndarray | BinaryTemplate = None, rect: tuple[int, int, int, int] = None,
+                     similarity: float = 0.9, colors: list[str | tuple] = None, color_similarity: float = 0.8,
+                     threshold: float = 128, mask: np.ndarray = None) -> tuple[tuple, float]:
+        """
+            二值匹配，参数与返回值同 Match.match_binary，rect 为 None 时搜索整个快照
+        """
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
+        image, x, y = self.crop(rect)
+        gray = None if colors else self.crop(rect, gray=True)[0]
+        source = binarize_image(image, colors, color_similarity, threshold, gray)
+
+        template = target_image
+        if not isinstance(template, BinaryTemplate):
+            template_image = np.asarray(target_image)
+            if mask is None and template_image.ndim == 3 and template_image.shape[2] == 4:
+                mask = template_image[..., 3] >= 128     # RGBA 模板的透明像素不参与匹配
+            template = BinaryTemplate(binarize_image(template_image, colors, color_similarity, threshold), mask)
+
+        found = match_binary_mask(source, template, similarity)
+        if found is None:
+            return (False, False), 0.0
+        left, top, mismatch = found
+        h, w = template.shape
+        return (int(left + w // 2 + x), int(top + h // 2 + y)), round(1 - mismatch / template.nbits, 3)
+
+    def find_all(self, target_image: np.ndarray | PreparedTemplate = None, rect: tuple[int, int, int, int] = None,
+                 similarity: float = 0.8, max_results: int = None, min_distance: int = None,
+                 mask: np.ndarray = None, zero_mean: bool = False) -> list[tuple[tuple, float]]:
+        """
+            查找所有匹配的图像，参数与返回值同 Match.find_all，rect 为 None 时搜索整个快照
+        """
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
+        source_image, x, y = self.crop(rect)
+        if not self._prefilter_check(rect, target_image, mask, zero_mean):
+            return []
+        s_channel, _, _ = self.crop(rect, gray=True)
+        template = self._resolve(target_image, source_image.shape, mask, zero_mean)
+        results = find_all_ncc(source_image, template, similarity, max_results, min_distance, s_channel)
+        if self.prefilter is not None:
+            self.prefilter.record(bool(results))
+        return [((cx + x, cy + y), sim) for (cx, cy), sim in results]
+
+    def _match_scales(self, source_image: np.ndarray, target_image: np.ndarray | PreparedTemplate,
+                      scales: list[float], similarity: float = 0.8, pyramid_levels: int = 0,
+                      s_channel: np.ndarray = None, mask: np.ndarray = None,
+                      zero_mean: bool = False) -> tuple[tuple, float, float]:
+        """
+        多尺度匹配：各比例的缩放模板缓存在预处理模板的尺度库中，只缩放一次；
+        整图搜索时所有比例共用源图频谱和局部能量积分图，金字塔搜索时逐个比例由粗到细搜索。
+        """
+        template = self._resolve(target_image, source_image.shape, mask, zero_mean)
+        if pyramid_levels > 0:
+            results = [match_pyramid(source_image, template.scaled(scale), similarity, pyramid_levels)
+                       for scale in scales]
+            return best_scale(results, scales)
+        return match_ncc_scales(source_image, template, scales, similarity, s_channel)
+
+    def _match_ncc(self, source_image: np.ndarray, target_image: np.ndarray | PreparedTemplate,
+                   similarity: float = 0.8, pyramid_levels: int = 0,
+                   s_channel: np.ndarray = None, mask: np.ndarray = None,
+                   zero_mean: bool = False) -> tuple[tuple, float]:
+        """
+        简介:
+            使用 FFT 加速的归一化互相关(NCC)方法匹配图像 (灰度)，并使用边缘检测进行二次验证。
+            模板侧的灰度、能量、频谱和边缘图来自预处理模板缓存，每次只需变换源图。
+            pyramid_levels > 0 时使用由粗到细的金字塔搜索；提供 tiler 时整图搜索按分块并行计算。
+            带掩码 (mask 或 RGBA 模板的 alpha) 时使用掩码 NCC，透明像素不参与匹配。
+            zero_mean 为 True 时使用去均值 NCC (TM_CCOEFF_NORMED 式)，平坦区域不再得高分，跳过边缘验证。
+
+        性能参考:
+            性能为 0.006秒 ~ 0.2秒 ~ 0.6秒 之间，取决于图像大小。
+            0.006秒 = source_image: 300x300, target_image: 100x100
+            0.2  秒 = source_image: 2560x1440, target_image: 100x100
+            0.6  秒 = source_image: 2560x1440, target_image: 2460x1340
+        """
+        template = self._resolve(target_image, source_image.shape, mask, zero_mean)
+        if pyramid_levels > 0:
+            return match_pyramid(source_image, template, similarity, pyramid_levels)
+        if self.tiler is not None:
+            return self.tiler.match(source_image, template, similarity, s_channel)
+        return match_ncc(source_image, template, similarity, s_channel)
+
+    def _match_rotations(self, source_image: np.ndarray, target_image: np.ndarray | PreparedTemplate,
+                         angles: list[float], similarity: float = 0.8, pyramid_levels: int = 0,
+                         s_channel: np.ndarray = None, mask: np.ndarray = None,
+                         zero_mean: bool = False) -> tuple[tuple, float, float]:
+        """
+        旋转匹配：各角度的旋转模板 (及掩码、频谱) 缓存在预处理模板的旋转库中，只旋转一次；
+        整图搜索时所有角度共用源图频谱和加权局部能量，金字塔搜索时逐个角度由粗到细搜索。
+        """
+        template = self._resolve(target_image, source_image.shape, mask, zero_mean)
+        if pyramid_levels > 0:
+            results = [match_pyramid(source_image, template.rotated(angle), similarity, pyramid_levels)
+                       for angle in angles]
+            return best_scale(results, angles)
+        return match_ncc_rotations(source_image, template, angles, similarity, s_channel)
+
+    def _prefilter_check(self, rect: tuple[int, int, int, int], target_image: np.ndarray | PreparedTemplate,
+                         mask: np.ndarray = None, zero_mean: bool = False, scale: float = 1.0,
+                         angle: float = None) -> bool:
+        """
+        颜色直方图预筛选，未设置预筛选时总是放行；旋转匹配时使用旋转模板 (内切圆) 的直方图
+        """
+        if self.prefilter is None:
+            return True
+        source_shape = self.crop(rect)[0].shape
+        template = self._resolve(target_image, source_shape, mask, zero_mean)
+        if angle is not None:
+            template = template.rotated(angle)
+        return self.prefilter.check(self.histogram(rect, self.prefilter.bins), template, scale)
+
+    def _resolve(self, target_image: np.ndarray | PreparedTemplate, source_shape: tuple[int, int],
+                 mask: np.ndarray = None, zero_mean: bool = False) -> PreparedTemplate:
+        """
+        从模板缓存获取预处理模板，zero_mean 时取其去均值副本
+        """
+        template = self.template_cache.resolve(target_image, source_shape, mask)
+        return template.centered() if zero_mean else template
@@ -0,0 +1,172 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import mss
+import numpy as np
+from PIL import Image
+
+from ..utils import RectTuple, DataHeader
+
+
+class FrameSource(ABC):
+    """
+    帧来源协议：Match / WindowMatch 通过 grab(rect) 获取 RGB 图像。
+
+    子类只需实现 grab()。默认的 MssFrameSource 截取屏幕；
+    其余实现从内存数组、图片目录或录制文件中取帧，可在无显示器的环境下运行全部匹配接口。
+    """
+    @abstractmethod
+    def grab(self, rect: RectTuple = None) -> np.ndarray:
+        """
+            获取区域图像
+        Args:
+            rect (RectTuple): 矩形区域 (x1, y1, x2, y2)，None 表示整帧
+        Returns:
+            np.ndarray: RGB 图像 (H, W, 3)，uint8
+        """
+
+
+class MssFrameSource(FrameSource):
+    """
+    使用 mss 截取屏幕
+    """
+    def __init__(self):
+        self.sct = mss.mss()
+        self.data_header = DataHeader()
+
+    def grab(self, rect: RectTuple = None) -> np.ndarray:
+        # 不指定区域时截取所有显示器组成的虚拟屏幕
+        screen_image = self.sct.grab(rect if rect is not None else self.sct.monitors[0])
+        # 转换为 numpy 数组，MSS 返回 BGRA 格式需要转换
+        return self.data_header.image_to_numpy(screen_image, to_rgb=True)
+
+
+class SequenceFrameSource(FrameSource):
+    """
+    多帧来源的基类：grab() 总是返回当前帧的区域，advance() 切换到下一帧。
+
+    帧图像左上角位于 origin，rect 使用与 origin 相同的坐标系 (屏幕坐标或窗口坐标)。
+    """
+    def __init__(self, origin: tuple[int, int] = (0, 0), loop: bool = False):
+        """
+        Args:
+            origin (tuple): 帧图像左上角在坐标系中的位置 (x, y)
+            loop (bool): 播放到最后一帧后是否回到第一帧
+        """
+        self.origin = origin
+        self.loop = loop
+        self.index = 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+            返回帧数
+        """
+
+    @abstractmethod
+    def frame(self, index: int) -> np.ndarray:
+        """
+            获取第 index 帧的完整图像
+        """
+
+    def seek(self, index: int) -> None:
+        """
+            跳转到第 index 帧
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"帧序号超出范围: {index}，共 {len(self)} 帧")
+        self.index = index
+
+    def advance(self) -> bool:
+        """
+            切换到下一帧
+        Returns:
+            bool: 是否成功切换；已是最后一帧且不循环时返回 False
+        """
+        if self.index + 1 < len(self):
+            self.index += 1
+            return True
+        if self.loop and len(self) > 0:
+            self.index = 0
+            return True
+        return False
+
+    def grab(self, rect: RectTuple = None) -> np.ndarray:
+        return crop_frame(self.frame(self.index), rect, self.origin)
+
+
+def crop_frame(frame: np.ndarray, rect: RectTuple = None, origin: tuple[int, int] = (0, 0)) -> np.ndarray:
+    """
+        从左上角位于 origin 的帧图像中截取 rect 区域 (视图，不复制)
+    """
+    if rect is None:
+        return frame
+    rect = RectTuple(*rect)
+    x1, y1 = rect.x1 - origin[0], rect.y1 - origin[1]
+    height, width = frame.shape[:2]
+    if x1 < 0 or y1 < 0 or x1 + rect.width > width or y1 + rect.height > height:
+        raise ValueError(f"rect 超出帧范围，帧区域 ({origin[0]}, {origin[1]}, "
+                         f"{origin[0] + width}, {origin[1] + height})，当前 rect={rect}")
+    return frame[y1:y1 + rect.height, x1:x1 + rect.width]
+
+
+class ArrayFrameSource(SequenceFrameSource):
+    """
+    内存数组帧来源，可传入单帧 (H, W, 3) 或多帧 (N, H, W, 3) / 帧列表
+    """
+    def __init__(self, frames: np.ndarray | list[np.ndarray], origin: tuple[int, int] = (0, 0),
+                 loop: bool = False):
+        super().__init__(origin, loop)
+        if isinstance(frames, np.ndarray) and frames.ndim == 3:
+            frames = [frames]
+        self.frames = frames
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def frame(self, index: int) -> np.ndarray:
+        return self.frames[index]
+
+
+class ImageDirFrameSource(SequenceFrameSource):
+    """
+    图片目录帧来源，按文件名排序逐帧读取，读取过的帧会被缓存
+    """
+    suffixes = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, directory: str, origin: tuple[int, int] = (0, 0), loop: bool = False):
+        super().__init__(origin, loop)
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise FileNotFoundError(f"目录不存在: {directory}")
+        self.paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in self.suffixes)
+        self._frames = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def frame(self, index: int) -> np.ndarray:
+        if index not in self._frames:
+            with Image.open(self.paths[index]) as image:
+                self._frames[index] = np.asarray(image.convert('RGB'))
+        return self._frames[index]
+
+
+class NpyFrameSource(SequenceFrameSource):
+    """
+    录制帧文件来源：读取形状为 (N, H, W, 3) 的 uint8 .npy 文件，以内存映射方式按需读取
+    """
+    def __init__(self, path: str, origin: tuple[int, int] = (0, 0), loop: bool = False):
+        super().__init__(origin, loop)
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"文件不存在: {path}")
+        self.frames = np.load(path, mmap_mode='r')
+        if self.frames.ndim != 4 or self.frames.shape[3] != 3:
+            raise ValueError(f"帧文件形状应为 (N, H, W, 3)，当前为 {self.frames.shape}")
+
+    def __len__(self) -> int:
+        return self.frames.shape[0]
+
+    def frame(self, index: int) -> np.ndarray:
+        return self.frames[index]
@@ -0,0 +1,518 @@
+import copy
+import functools
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+from ..utils import DataHeader, ImageCache
+from .color import color_histogram
+from .fft import FFTEngine, DEFAULT_ENGINE
+
+
+def edge_detection(gray: np.ndarray) -> np.ndarray:
+    """
+    使用 Sobel 算子进行边缘检测 (输入为灰度图)
+    """
+    sobel_x = ndimage.sobel(gray, axis=0, mode='constant')
+    sobel_y = ndimage.sobel(gray, axis=1, mode='constant')
+    edges = np.sqrt(sobel_x**2 + sobel_y**2)
+
+    # 归一化
+    edges = edges / (np.max(edges) + 1e-8)
+    return edges
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """
+        按面积平均缩小图像 (整数倍)，末尾不足 factor 的行列被裁掉
+    Args:
+        image (np.ndarray): 二维灰度或三维 RGB 图像
+        factor (int): 缩小倍数
+    Returns:
+        np.ndarray: 缩小后的 float32 图像
+    """
+    if factor == 1:
+        return np.asarray(image, dtype=np.float32)
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    # 逐个累加 factor × factor 个跨步切片，比 reshape 后对小轴求均值快
+    result = np.zeros((height, width, *image.shape[2:]), dtype=np.float32)
+    for dy in range(factor):
+        for dx in range(factor):
+            result += image[dy:height * factor:factor, dx:width * factor:factor]
+    result /= factor * factor
+    return result
+
+
+def resize(image: np.ndarray, scale: float) -> np.ndarray:
+    """
+        按比例缩放图像，缩小时按面积抗锯齿 (PIL 双线性)
+    Args:
+        image (np.ndarray): 二维灰度/掩码或三维 RGB / RGBA 图像
+        scale (float): 缩放比例
+    Returns:
+        np.ndarray: 缩放后的图像，uint8 输入保持 uint8，其他输入返回 float32
+    """
+    height, width = image.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if image.dtype == np.uint8:
+        return np.asarray(Image.fromarray(image).resize(size, Image.BILINEAR))
+
+    # 浮点图像逐通道以 'F' 模式缩放
+    channels = [image] if image.ndim == 2 else [image[..., i] for i in range(image.shape[2])]
+    resized = [np.asarray(Image.fromarray(np.asarray(c, dtype=np.float32), 'F').resize(size, Image.BILINEAR))
+               for c in channels]
+    return resized[0] if image.ndim == 2 else np.stack(resized, axis=-1)
+
+
+def rotate(image: np.ndarray, angle: float) -> np.ndarray:
+    """
+        绕中心逆时针旋转图像，尺寸不变，超出原图的部分填 0 (PIL 双线性)
+    Args:
+        image (np.ndarray): 二维灰度/掩码或三维 RGB / RGBA 图像
+        angle (float): 逆时针旋转角度 (度)
+    Returns:
+        np.ndarray: 旋转后的图像，uint8 输入保持 uint8，其他输入返回 float32
+    """
+    if image.dtype == np.uint8:
+        return np.asarray(Image.fromarray(image).rotate(angle, Image.BILINEAR))
+
+    # 浮点图像逐通道以 'F' 模式旋转
+    channels = [image] if image.ndim == 2 else [image[..., i] for i in range(image.shape[2])]
+    rotated = [np.asarray(Image.fromarray(np.asarray(c, dtype=np.float32), 'F').rotate(angle, Image.BILINEAR))
+               for c in channels]
+    return rotated[0] if image.ndim == 2 else np.stack(rotated, axis=-1)
+
+
+def disc_mask(size: int) -> np.ndarray:
+    """
+        size × size 的内切圆掩码 (float32)，半径比内切圆小 1 像素，使旋转时填充的角落及其边缘不落入掩码
+    """
+    center = (size - 1) / 2
+    ys, xs = np.ogrid[:size, :size]
+    radius = max(center - 1, 0.5)
+    return ((ys - center) ** 2 + (xs - center) ** 2 <= radius ** 2).astype(np.float32)
+
+
+def template_mask(image: np.ndarray, mask: np.ndarray = None) -> np.ndarray | None:
+    """
+        获取模板的权重掩码：优先使用显式 mask，否则使用 RGBA 模板的 alpha 通道
+    Args:
+        image (np.ndarray): 模板图像 (RGB 或 RGBA，alpha 按 0 ~ 255 换算为权重)
+        mask (np.ndarray): 与模板同尺寸的掩码，bool 或 0 ~ 1 的浮点数表示权重，uint8 按 0 ~ 255 换算
+    Returns:
+        np.ndarray | None: float32 权重 (H, W)，模板完全不透明或没有掩码时返回 None
+    """
+    if mask is None:
+        if image.ndim != 3 or image.shape[2] < 4:
+            return None
+        weights = image[..., 3].astype(np.float32)
+        weights *= np.float32(1 / 255)
+    else:
+        mask = np.asarray(mask)
+        if mask.shape != image.shape[:2]:
+            raise ValueError(f"mask 尺寸 {mask.shape} 与模板尺寸 {image.shape[:2]} 不一致")
+        weights = mask.astype(np.float32)
+        if mask.dtype == np.uint8:
+            weights *= np.float32(1 / 255)
+    if np.all(weights == 1):
+        return None     # 完全不透明，按普通模板处理
+    return weights
+
+
+class PreparedTemplate:
+    """
+    预处理模板，缓存模板侧在每次匹配中都不变的数据：
+    灰度图、模板能量、Sobel 边缘图，以及在源图 FFT 尺寸下翻转模板的频谱。
+
+    同一模板在同尺寸区域上反复匹配时，只需对源图做一次正向 FFT、
+    一次频谱相乘和一次逆 FFT。
+
+    带掩码 (RGBA 模板的 alpha 或显式 mask) 时按权重 w 计算掩码 NCC：
+        Σ w·T·S / sqrt(Σ w·T² × Σ w·S²)
+    分子使用 w·T 的频谱，局部能量 Σ w·S² 使用掩码频谱与源图平方频谱相乘得到，仍然是 FFT 计算。
+
+    centered() 返回去均值 (TM_CCOEFF_NORMED 式) 的副本：模板减去 (加权) 均值后再计算频谱和能量，
+    得分对窗口亮度偏移不敏感，平坦的亮色区域不会再得到高分。
+
+    rotated() 返回旋转后的模板，各角度组成旋转库：只取模板中心的内切圆 (正方形内切圆掩码)，
+    旋转后内容仍在同一正方形内，所有角度尺寸相同；无掩码模板的所有角度共用同一个圆形掩码及其频谱，
+    加权局部能量只需计算一次。
+
+    金字塔层、尺度库、旋转库、分块模板和去均值副本都在首次使用时生成，生成后通过 on_grow 回调
+    报告新增的字节数，使所属的图像缓存条目 (见 TemplateCache) 按实际占用计入字节预算。
+    """
+    def __init__(self, image: np.ndarray, source_shape: tuple[int, int], precomputed: dict = None,
+                 mask: np.ndarray = None, fft: FFTEngine = None, mask_spectra: dict = None):
+        """
+        Args:
+            image (np.ndarray): 模板图像 (RGB 或 RGBA)
+            source_shape (tuple): 源图尺寸 (height, width)
+            precomputed (dict): 预先计算好的 gray / edges / norm 及金字塔各层 levels，
+                                通常来自 TemplateLibrary，提供时不再重新计算
+            mask (np.ndarray): 与模板同尺寸的掩码，None 时使用 RGBA 模板的 alpha 通道
+            fft (FFTEngine): FFT 后端，None 时使用默认的 scipy.fft 后端；源图频谱也由同一后端计算
+            mask_spectra (dict): FFT 尺寸 -> 掩码频谱，多个模板使用同一掩码时传入同一个字典共用掩码频谱
+        """
+        precomputed = precomputed or {}
+        self.fft = fft if fft is not None else DEFAULT_ENGINE
+
+        self.source = image     # 保留原对象引用，用于缓存的身份校验
+        self.mask_source = mask
+        self.image = np.asarray(image)
+        if 'gray' in precomputed:
+            self.gray = precomputed['gray']
+            self.edges = precomputed['edges']
+        else:
+            self.gray = DataHeader().rgb_to_gray(self.image)
+            self.edges = edge_detection(self.gray)
+
+        self.mask = template_mask(self.image, mask)
+        if self.mask is None:
+            self.norm = float(precomputed['norm']) if 'norm' in precomputed else float(np.linalg.norm(self.gray))
+        else:
+            self.norm = float(np.sqrt(np.sum(self.gray * self.mask * self.gray, dtype=np.float64)))
+            self.edges = self.edges * self.mask
+
+        self._levels = precomputed.get('levels', {})
+        self._histograms = {}   # 量化级数 -> 颜色直方图，与源图尺寸无关
+        self._disc = None       # 旋转库共用的内切圆掩码
+        self._disc_spectra = {}     # 内切圆掩码的频谱 (按 FFT 尺寸)，旋转库各角度共用
+        self._mask_spectra = mask_spectra if mask_spectra is not None else {}
+        self.on_grow = None     # 子模板生成后以新增字节数调用，用于更新所属缓存条目的字节数
+        self.zero_mean = False
+        self._transform(source_shape)
+
+    def _transform(self, source_shape: tuple[int, int]) -> None:
+        """
+        计算与源图尺寸相关的数据：FFT 尺寸、翻转模板 (及掩码) 的频谱，并清空依赖源图尺寸的子模板
+        """
+        self.source_shape = tuple(source_shape[:2])
+        # 循环卷积只要不短于源图即可保证 valid 区域不发生回绕，再补齐到快速 FFT 尺寸
+        self.fft_shape = self.fft.fast_shape(self.source_shape)
+
+        if self.mask is None:
+            self.spectrum = self.fft.rfft2(self.gray[::-1, ::-1], self.fft_shape)
+            self.mask_spectrum = None
+            self._owns_mask_spectrum = False
+        else:
+            weighted = self.gray * self.mask
+            self.spectrum = self.fft.rfft2(weighted[::-1, ::-1], self.fft_shape)
+            # 掩码相同的模板 (去均值副本、分块模板、旋转库各角度) 共用掩码频谱，只有首次计算者计入字节数
+            self.mask_spectrum = self._mask_spectra.get(self.fft_shape)
+            self._owns_mask_spectrum = self.mask_spectrum is None
+            if self.mask_spectrum is None:
+                # 局部能量的动态范围大，掩码频谱使用 float64 计算
+                self.mask_spectrum = self.fft.rfft2(self.mask[::-1, ::-1].astype(np.float64), self.fft_shape)
+                self._mask_spectra[self.fft_shape] = self.mask_spectrum
+
+        self._pyramid = {}
+        self._scales = {}
+        self._rotations = {}
+        self._tiles = {}
+        self._centered = None
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """返回模板尺寸 (height, width)"""
+        return self.gray.shape
+
+    @property
+    def nbytes(self) -> int:
+        """返回预处理数据占用的字节数 (不含原模板图像)，包括已生成的全部子模板"""
+        nbytes = self.gray.nbytes + self.edges.nbytes + self._spectra_nbytes()
+        if self.mask is not None:
+            nbytes += self.mask.nbytes
+        nbytes += sum(level.nbytes for level in self._pyramid.values())
+        nbytes += sum(tile._spectra_nbytes() for tile in self._tiles.values())   # 分块模板共用灰度、边缘和掩码
+        if self._centered is not None:
+            nbytes += self._centered.nbytes
+        nbytes += sum(rotated.nbytes for rotated in self._rotations.values())
+        return nbytes + sum(scaled.nbytes for scaled in self._scales.values())
+
+    def _spectra_nbytes(self) -> int:
+        # 共用的掩码频谱只计入首次计算它的模板
+        return self.spectrum.nbytes + (self.mask_spectrum.nbytes if self._owns_mask_spectrum else 0)
+
+    def _adopt(self, template: 'PreparedTemplate', nbytes: int = None) -> 'PreparedTemplate':
+        """
+        登记新生成的子模板：子模板继承 on_grow 回调 (其自身的子模板同样计入)，并报告新增的字节数
+        """
+        template.on_grow = self.on_grow
+        if self.on_grow is not None:
+            self.on_grow(template.nbytes if nbytes is None else nbytes)
+        return template
+
+    def _variant(self, template: 'PreparedTemplate') -> 'PreparedTemplate':
+        """
+        子模板按本模板是否去均值取对应的副本；只保留去均值副本时，由它接管掩码频谱的字节数
+        """
+        if not self.zero_mean:
+            return template
+        centered = template.centered()
+        centered._owns_mask_spectrum = template._owns_mask_spectrum
+        return centered
+
+    def fits(self, source_shape: tuple[int, int]) -> bool:
+        """模板是否能放入给定尺寸的源图"""
+        h, w = self.shape
+        return h <= source_shape[0] and w <= source_shape[1]
+
+    def pyramid_level(self, level: int) -> 'PreparedTemplate':
+        """
+            获取金字塔第 level 层 (缩小 2**level 倍) 的预处理模板，首次调用时生成并缓存
+        Args:
+            level (int): 金字塔层数，0 为原图
+        Returns:
+            PreparedTemplate: 对应层的预处理模板
+        """
+        if level == 0:
+            return self
+        if level not in self._pyramid:
+            factor = 2 ** level
+            # 显式掩码按权重缩小；RGBA 模板的 alpha 随图像一起缩小
+            mask = None
+            if self.mask_source is not None and self.mask is not None:
+                mask = downsample(self.mask, factor)
+            coarse_shape = tuple(n // factor for n in self.source_shape)
+            if level in self._levels:
+                # 模板库中已存有该层的缩小图像及其灰度、边缘
+                coarse = self._levels[level]
+                template = PreparedTemplate(coarse['image'], coarse_shape, coarse, mask, self.fft)
+            else:
+                template = PreparedTemplate(downsample(self.image, factor), coarse_shape, mask=mask, fft=self.fft)
+            self._pyramid[level] = self._adopt(self._variant(template))
+        return self._pyramid[level]
+
+    def scaled(self, scale: float) -> 'PreparedTemplate':
+        """
+            获取缩放 scale 倍后的预处理模板 (源图尺寸不变)，首次调用时缩放并缓存，
+            同一模板的各缩放比例组成尺度库，与本模板共用 FFT 尺寸
+        Args:
+            scale (float): 缩放比例，如 1.25 对应 125% 显示缩放
+        Returns:
+            PreparedTemplate: 对应比例的预处理模板
+        """
+        if scale == 1:
+            return self
+        if scale not in self._scales:
+            mask = None
+            if self.mask_source is not None and self.mask is not None:
+                mask = resize(self.mask, scale)
+            template = PreparedTemplate(resize(self.image, scale), self.source_shape, mask=mask, fft=self.fft)
+            self._scales[scale] = self._adopt(self._variant(template))
+        return self._scales[scale]
+
+    def rotated(self, angle: float) -> 'PreparedTemplate':
+        """
+            获取逆时针旋转 angle 度后的预处理模板 (源图尺寸不变)，首次调用时旋转并缓存，
+            同一模板的各角度组成旋转库，与本模板共用 FFT 尺寸。
+            只保留模板中心边长为短边的正方形内切圆，0 度时同样如此，各角度的得分可以直接比较
+        Args:
+            angle (float): 逆时针旋转角度 (度)
+        Returns:
+            PreparedTemplate: 对应角度的预处理模板，尺寸为 (短边, 短边)
+        """
+        angle = float(angle) % 360
+        if angle not in self._rotations:
+            h, w = self.shape
+            size = min(h, w)
+            top, left = (h - size) // 2, (w - size) // 2
+            if self._disc is None:
+                self._disc = disc_mask(size)
+            image = rotate(self.image[top:top + size, left:left + size], angle)
+            if self.mask is None:
+                # 所有角度共用同一个掩码对象及其频谱，匹配时据此共用加权局部能量
+                mask, spectra = self._disc, self._disc_spectra
+            else:
+                mask, spectra = rotate(self.mask[top:top + size, left:left + size], angle) * self._disc, None
+            template = PreparedTemplate(image, self.source_shape, mask=mask, fft=self.fft, mask_spectra=spectra)
+            self._rotations[angle] = self._adopt(self._variant(template))
+        return self._rotations[angle]
+
+    def for_tile(self, tile_shape: tuple[int, int]) -> 'PreparedTemplate':
+        """
+            获取用于 tile_shape 尺寸分块的预处理模板，共用灰度、边缘和掩码，只重新计算频谱，首次调用时缓存
+        Args:
+            tile_shape (tuple): 分块尺寸 (height, width)
+        Returns:
+            PreparedTemplate: 对应分块尺寸的预处理模板
+        """
+        tile_shape = tuple(tile_shape[:2])
+        if tile_shape == self.source_shape:
+            return self
+        if tile_shape not in self._tiles:
+            template = copy.copy(self)
+            template._transform(tile_shape)
+            self._tiles[tile_shape] = self._adopt(template, template._spectra_nbytes())
+        return self._tiles[tile_shape]
+
+    def color_histogram(self, bins: int = 4) -> np.ndarray:
+        """
+            获取模板的量化颜色直方图 (带掩码时按权重计数)，首次调用时计算并缓存，供颜色预筛选使用
+        Args:
+            bins (int): 每个通道的量化级数
+        Returns:
+            np.ndarray: 长度为 bins³ 的像素计数
+        """
+        if bins not in self._histograms:
+            self._histograms[bins] = color_histogram(self.image, bins, self.mask)
+        return self._histograms[bins]
+
+    def centered(self) -> 'PreparedTemplate':
+        """
+            获取去均值的预处理模板 (TM_CCOEFF_NORMED 式)，共用边缘和掩码，首次调用时计算频谱并缓存；
+            其金字塔层、尺度库和分块模板同样为去均值模板
+        Returns:
+            PreparedTemplate: 去均值模板，本身已去均值时返回自身
+        """
+        if self.zero_mean:
+            return self
+        if self._centered is None:
+            template = copy.copy(self)
+            template.zero_mean = True
+            if self.mask is None:
+                template.gray = self.gray - np.float32(self.gray.mean(dtype=np.float64))
+                template.norm = float(np.linalg.norm(template.gray))
+            else:
+                # 按掩码权重求均值，透明像素不参与
+                weight = float(np.sum(self.mask, dtype=np.float64))
+                mean = float(np.sum(self.gray * self.mask, dtype=np.float64)) / weight if weight else 0.0
+                template.gray = self.gray - np.float32(mean)
+                template.norm = float(np.sqrt(np.sum(template.gray * self.mask * template.gray, dtype=np.float64)))
+            template._transform(self.source_shape)
+            self._centered = self._adopt(template)
+        return self._centered
+
+    def correlate(self, source_spectrum: np.ndarray) -> np.ndarray:
+        """
+            使用源图频谱计算 valid 区域的互相关
+        Args:
+            source_spectrum (np.ndarray): 源图在 fft_shape 下的 rfft2 频谱
+        Returns:
+            np.ndarray: valid 区域的互相关结果
+        """
+        return self._valid(self.fft.irfft2(source_spectrum * self.spectrum, self.fft_shape))
+
+    def masked_energy(self, squared_spectrum: np.ndarray) -> np.ndarray:
+        """
+            使用源图平方的频谱计算掩码加权的局部能量 Σ w·S² (传入源图频谱时得到加权窗口和 Σ w·S)
+        Args:
+            squared_spectrum (np.ndarray): 源图灰度平方 (float64) 在 fft_shape 下的 rfft2 频谱
+        Returns:
+            np.ndarray: valid 区域的局部能量
+        """
+        return self._valid(self.fft.irfft2(squared_spectrum * self.mask_spectrum, self.fft_shape))
+
+    def _valid(self, full: np.ndarray) -> np.ndarray:
+        h, w = self.shape
+        sh, sw = self.source_shape
+        return full[h - 1:sh, w - 1:sw]
+
+
+class TemplateCache:
+    """
+    预处理模板的 LRU 缓存，以 (模板对象标识, 源图尺寸) 为键。
+
+    由 load_image 加载的模板，其预处理结果作为派生数据存入 DataHeader 的图像缓存条目，
+    与原图一起计入字节预算、一起被淘汰；其他数组模板存放在本缓存自身的 LRU 中。
+    从已注册的 TemplateLibrary 取出的模板，预处理时直接使用库中预先计算的数据。
+
+    注意: 以对象标识为键，原地修改过的模板数组需调用 clear() 后才会重新预处理。
+    """
+    def __init__(self, maxsize: int = 64, image_cache: ImageCache = None, fft: FFTEngine = None):
+        """
+        Args:
+            maxsize (int): 自身 LRU 的最大条目数
+            image_cache (ImageCache): 图像缓存，通常为 DataHeader.image_cache
+            fft (FFTEngine): 新建预处理模板使用的 FFT 后端
+        """
+        self.maxsize = maxsize
+        self.image_cache = image_cache
+        self.fft = fft if fft is not None else DEFAULT_ENGINE
+        self.libraries = []
+        self._items = OrderedDict()
+
+    def add_library(self, library) -> None:
+        """
+            注册模板库，之后从该库取出的模板不再重新计算灰度、边缘和金字塔数据
+        Args:
+            library (TemplateLibrary): 模板库
+        """
+        if library not in self.libraries:
+            self.libraries.append(library)
+
+    def _create(self, image: np.ndarray, source_shape: tuple[int, int], mask: np.ndarray = None) -> PreparedTemplate:
+        for library in self.libraries:
+            template = library.prepare(image, source_shape, mask, self.fft)
+            if template is not None:
+                return template
+        return PreparedTemplate(image, source_shape, mask=mask, fft=self.fft)
+
+    def get(self, image: np.ndarray, source_shape: tuple[int, int], mask: np.ndarray = None) -> PreparedTemplate:
+        """
+            获取预处理模板，不存在时创建并缓存
+        Args:
+            image (np.ndarray): 模板图像
+            source_shape (tuple): 源图尺寸 (height, width)
+            mask (np.ndarray): 显式掩码，与模板数组一样按对象标识缓存
+        Returns:
+            PreparedTemplate: 预处理模板
+        """
+        source_shape = tuple(source_shape[:2])
+
+        # 已在图像缓存中的模板，预处理结果随原图条目存放
+        derived = None
+        if self.image_cache is not None and mask is None:
+            derived = self.image_cache.derived(image)
+        if derived is not None:
+            name = ('template', source_shape)
+            template = derived.get(name)
+            if template is None:
+                template = self._create(image, source_shape)
+                self.image_cache.add_derived(image, name, template, template.nbytes)
+                # 之后生成的金字塔层、尺度库、旋转库等同样计入该条目的字节数
+                template.on_grow = functools.partial(self.image_cache.grow_derived, image)
+            return template
+
+        key = (id(image), id(mask), source_shape)
+        template = self._items.get(key)
+        if template is not None and template.source is image and template.mask_source is mask:
+            self._items.move_to_end(key)
+            return template
+
+        template = self._create(image, source_shape, mask)
+        self._items[key] = template
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return template
+
+    def resolve(self, target_image: np.ndarray | PreparedTemplate,
+                source_shape: tuple[int, int], mask: np.ndarray = None) -> PreparedTemplate:
+        """
+            获取与源图尺寸匹配的预处理模板，传入的预处理模板尺寸不符时按其原图和掩码重新获取 (去均值模板仍返回去均值模板)
+        Args:
+            target_image (np.ndarray | PreparedTemplate): 模板图像或预处理模板
+            source_shape (tuple): 源图尺寸 (height, width)
+            mask (np.ndarray): 显式掩码，target_image 为预处理模板时忽略
+        Returns:
+            PreparedTemplate: 预处理模板
+        """
+        if isinstance(target_image, PreparedTemplate):
+            if target_image.source_shape == tuple(source_shape[:2]):
+                return target_image
+            if target_image.zero_mean:
+                return self.get(target_image.source, source_shape, target_image.mask_source).centered()
+            target_image, mask = target_image.source, target_image.mask_source
+        return self.get(target_image, source_shape, mask)
+
+    def clear(self) -> None:
+        """
+            清空缓存
+        """
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..utils import DataHeader
+from .ncc import ncc_map, verify_hit, match_ncc
+from .template import PreparedTemplate
+
+
+def ncc_working_bytes(source_shape: tuple[int, int], template: PreparedTemplate) -> int:
+    """
+        估算一次整图 NCC 同时存在的工作数组字节数 (不含源图与灰度平面)：
+        源图频谱、频谱乘积、逆 FFT 结果、源图平方及其积分图、窗口能量和 NCC 结果图
+    Args:
+        source_shape (tuple): 源图尺寸 (height, width)
+        template (PreparedTemplate): 源图尺寸下的预处理模板
+    Returns:
+        int: 估算字节数
+    """
+    height, width = source_shape[:2]
+    fft_h, fft_w = template.fft_shape
+    h, w = template.shape
+    spectrum = fft_h * (fft_w // 2 + 1) * 8         # complex64
+    valid = (height - h + 1) * (width - w + 1) * 8  # float64
+    return (2 * spectrum                            # 源图频谱 + 与模板频谱的乘积
+            + fft_h * fft_w * 4                     # 逆 FFT 结果 (float32)
+            + height * width * 4                    # 源图平方
+            + (height + 1) * (width + 1) * 8        # 积分图
+            + 2 * valid)                            # 窗口能量 + NCC 结果图
+
+
+class TiledNCC:
+    """
+    分块并行 NCC：把源图切分为相互重叠的分块 (重叠宽度为模板尺寸 - 1，保证每个窗口完整落在某个分块内)，
+    在线程池中逐块计算 NCC (scipy.fft 计算期间释放 GIL)，再合并各块的最大值。
+
+    每个分块的工作数组只有分块大小，峰值内存约为 workers 个分块的工作数组之和，远小于整图计算；
+    同一窗口在分块内与整图中的 NCC 数学上相同，匹配位置与未分块路径一致，相似度差异仅为浮点舍入 (小于 0.001)。
+
+    最近一次匹配的分块数、线程数与峰值内存估算记录在 stats 中。
+    """
+    def __init__(self, tile_size: int = 1024, workers: int = None):
+        """
+        Args:
+            tile_size (int): 每个分块负责的 NCC 结果区域边长 (像素)，分块实际尺寸还要加上模板尺寸 - 1
+            workers (int): 线程数，默认为 CPU 核数
+        """
+        self.tile_size = tile_size
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.stats = {}
+        self._executor = None
+        self._executor_workers = 0
+
+    def tiles(self, source_shape: tuple[int, int], template_shape: tuple[int, int]) -> list[tuple[int, int, int, int]]:
+        """
+            计算分块区域
+        Args:
+            source_shape (tuple): 源图尺寸 (height, width)
+            template_shape (tuple): 模板尺寸 (height, width)
+        Returns:
+            list[tuple]: 源图中的分块区域 (x1, y1, x2, y2) 列表，按行优先排列
+        """
+        height, width = source_shape[:2]
+        h, w = template_shape
+        out_h, out_w = height - h + 1, width - w + 1
+        return [(x, y, min(x + self.tile_size, out_w) + w - 1, min(y + self.tile_size, out_h) + h - 1)
+                for y in range(0, out_h, self.tile_size)
+                for x in range(0, out_w, self.tile_size)]
+
+    def match(self, source_image: np.ndarray, template: PreparedTemplate, similarity: float = 0.8,
+              s_channel: np.ndarray = None) -> tuple[tuple, float]:
+        """
+            分块并行计算 NCC，取全图最佳位置并做边缘验证，返回值同 match_ncc
+        Args:
+            source_image (np.ndarray): 源图 (RGB，uint8 或 float32)
+            template (PreparedTemplate): 源图尺寸下的预处理模板
+            similarity (float): 相似度阈值
+            s_channel (np.ndarray): 源图灰度平面，不提供时由 source_image 转换
+        Returns:
+            tuple[tuple[int, int], float]: 匹配中心坐标 (相对源图) 和相似度
+        """
+        if template.norm == 0 or not template.fits(source_image.shape):
+            return (False, False), 0.0
+        if s_channel is None:
+            s_channel = DataHeader().rgb_to_gray(source_image)
+
+        tiles = self.tiles(source_image.shape, template.shape)
+        untiled_bytes = ncc_working_bytes(source_image.shape, template)
+        if len(tiles) == 1:
+            self.stats = {'tiles': 1, 'workers': 1, 'peak_bytes': untiled_bytes, 'untiled_bytes': untiled_bytes}
+            return match_ncc(source_image, template, similarity, s_channel)
+
+        # 各分块尺寸的模板频谱在主线程中准备好，工作线程只读
+        tile_templates = {}
+        for x1, y1, x2, y2 in tiles:
+            shape = (y2 - y1, x2 - x1)
+            if shape not in tile_templates:
+                tile_templates[shape] = template.for_tile(shape)
+
+        def run(tile):
+            x1, y1, x2, y2 = tile
+            tile_template = tile_templates[(y2 - y1, x2 - x1)]
+            ncc = ncc_map(s_channel[y1:y2, x1:x2], tile_template)
+            y, x = np.unravel_index(np.argmax(ncc), ncc.shape)
+            return float(ncc[y, x]), y1 + int(y), x1 + int(x)
+
+        workers = min(self.workers, len(tiles))
+        if workers > 1:
+            if self._executor is None or self._executor_workers != self.workers:
+                self.close()
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+                self._executor_workers = self.workers
+            maxima = list(self._executor.map(run, tiles))
+        else:
+            maxima = [run(tile) for tile in tiles]
+
+        # 合并各块最大值，得分相同时取行优先的第一个位置，与整图 argmax 一致
+        score, y, x = max(maxima, key=lambda m: (m[0], -m[1], -m[2]))
+
+        tile_bytes = max(ncc_working_bytes((y2 - y1, x2 - x1), tile_templates[(y2 - y1, x2 - x1)])
+                         for x1, y1, x2, y2 in tiles)
+        self.stats = {'tiles': len(tiles), 'workers': workers,
+                      'peak_bytes': tile_bytes * workers, 'untiled_bytes': untiled_bytes}
+        return verify_hit(source_image, template, x, y, score, similarity)
+
+    def close(self) -> None:
+        """
+            关闭线程池
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,122 @@
+import numpy as np
+
+from ..utils import RectTuple
+from .ncc import ncc_region, verify_hit
+from .template import PreparedTemplate
+
+
+class Tracker:
+    """
+    时间局部性跟踪器：界面元素很少移动，每次 update() 先只截取上次命中位置附近的小区域，
+    直接计算 NCC 并做边缘验证 (快速路径)；局部得分低于阈值或验证失败时才回退到整块区域的 FFT 搜索。
+
+    快速路径命中率由 hits / fallbacks / hit_rate 给出。
+    通常由 Match.track() / WindowMatch.track() 创建，坐标为截图来源的坐标系。
+    """
+    def __init__(self, owner, target_image: np.ndarray | PreparedTemplate, rect: tuple[int, int, int, int] = None,
+                 similarity: float = 0.8, radius: int = 16, pyramid_levels: int = 0, mask: np.ndarray = None,
+                 zero_mean: bool = False):
+        """
+        Args:
+            owner (Match | WindowMatch): 提供 snapshot() 和 template_cache 的匹配对象
+            target_image (np.ndarray | PreparedTemplate): 目标图像或预处理模板
+            rect (tuple): 整块搜索区域 (x1, y1, x2, y2)，WindowMatch 可为 None 表示整个窗口
+            similarity (float): 相似度阈值
+            radius (int): 快速路径在上次位置周围的搜索半径 (像素)
+            pyramid_levels (int): 回退到整块搜索时使用的金字塔层数
+            mask (np.ndarray): 模板掩码，同 match_image
+            zero_mean (bool): 是否使用去均值 NCC，同 match_image
+        """
+        self.owner = owner
+        self.target_image = target_image
+        self.rect = RectTuple(*rect) if rect is not None else None
+        self.similarity = similarity
+        self.radius = radius
+        self.pyramid_levels = pyramid_levels
+        self.mask = mask
+        self.zero_mean = zero_mean
+
+        self.position = None    # 上次命中的模板左上角 (来源坐标)
+        self.bounds = None      # 整块搜索区域在来源坐标系中的范围
+        self.hits = 0           # 快速路径命中次数
+        self.fallbacks = 0      # 回退到整块搜索的次数
+        self._template = None
+
+    @property
+    def hit_rate(self) -> float:
+        """返回快速路径命中率"""
+        total = self.hits + self.fallbacks
+        return self.hits / total if total else 0.0
+
+    def info(self) -> dict:
+        """
+            返回跟踪统计：快速路径命中次数、回退次数、命中率和上次命中位置
+        """
+        return {'hits': self.hits, 'fallbacks': self.fallbacks,
+                'hit_rate': self.hit_rate, 'position': self.position}
+
+    def reset(self) -> None:
+        """
+            清除上次命中位置和统计，下一次 update() 做整块搜索
+        """
+        self.position = None
+        self.hits = self.fallbacks = 0
+
+    def update(self) -> tuple[tuple, float]:
+        """
+            截图并更新目标位置
+        Returns:
+            tuple[tuple[int, int], float]: 匹配中心坐标和相似度，同 match_image；未找到时坐标为 (False, False)
+        """
+        if self.position is not None:
+            result = self._local_search()
+            if result is not None:
+                self.hits += 1
+                return result
+
+        self.fallbacks += 1
+        return self._full_search()
+
+    def _local_search(self) -> tuple[tuple, float] | None:
+        """
+        只截取上次位置周围 radius 范围的区域，直接计算 NCC，未通过阈值和边缘验证时返回 None
+        """
+        h, w = self._template.shape
+        x, y = self.position
+        bounds, radius = self.bounds, self.radius
+        local = RectTuple(max(bounds.x1, x - radius), max(bounds.y1, y - radius),
+                          min(bounds.x2, x + w + radius), min(bounds.y2, y + h + radius))
+        if local.width < w or local.height < h:
+            return None
+
+        snapshot = self.owner.snapshot(local)
+        s_channel, x0, y0 = snapshot.crop(None, gray=True)
+        ncc, nx, ny = ncc_region(s_channel, self._template, 0, 0, local.width - w, local.height - h)
+        if ncc.size == 0:
+            return None
+
+        iy, ix = np.unravel_index(np.argmax(ncc), ncc.shape)
+        left, top = nx + int(ix), ny + int(iy)
+        (cx, cy), sim = verify_hit(snapshot.image, self._template, left, top, float(ncc[iy, ix]), self.similarity)
+        if cx is False:
+            return None
+        self.position = (x0 + left, y0 + top)
+        return (int(cx + x0), int(cy + y0)), sim
+
+    def _full_search(self) -> tuple[tuple, float]:
+        """
+        整块区域 FFT 搜索，命中时记录位置供下一次快速路径使用
+        """
+        snapshot = self.owner.snapshot(self.rect)
+        self.bounds = snapshot.rect
+        (cx, cy), sim = snapshot.match_image(self.target_image, None, self.similarity,
+                                             self.pyramid_levels, self.mask, zero_mean=self.zero_mean)
+        template = self.owner.template_cache.resolve(self.target_image, snapshot.image.shape, self.mask)
+        self._template = template.centered() if self.zero_mean else template
+
+        if cx is False:
+            self.position = None
+        else:
+            h, w = self._template.shape
+            self.position = (cx - w // 2, cy - h // 2)
+        return (cx, cy), sim
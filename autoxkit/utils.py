@@ -1,7 +1,11 @@
 import numpy as np
+from collections import OrderedDict
 from pathlib import Path
 from PIL import Image
 
+# 0 ~ 255 每个字节中 1 的个数，用于按字节查表求汉明距离 (ocr、binary 共用)
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
 class RectTuple(tuple):
     """
     矩形元组类，确保参数满足以下要求：
@@ -64,12 +68,144 @@ class RectTuple(tuple):
         return f"({self.x1}, {self.y1}, {self.x2}, {self.y2})"
 
 
+class ImageCache:
+    """
+    按字节预算淘汰的 LRU 图像缓存。
+
+    每个条目保存图像本身、来源文件的 mtime/size，以及由该图像派生的数据 (灰度、边缘、频谱等)；
+    条目的字节数包含派生数据，淘汰一个条目会同时释放它的全部派生数据。
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): 缓存字节预算 (按 ndarray.nbytes 统计)
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._keys_by_id = dict()
+
+    def get(self, key: str, mtime: int = None, size: int = None) -> np.ndarray | None:
+        """
+            获取缓存图像，文件 mtime/size 与缓存时不一致视为失效
+        Args:
+            key (str): 缓存键 (文件路径)
+            mtime (int): 文件当前的 mtime (纳秒)，None 表示不校验
+            size (int): 文件当前的字节数，None 表示不校验
+        Returns:
+            np.ndarray | None: 命中时返回图像，否则返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (mtime is None or entry['mtime'] == mtime) and (size is None or entry['size'] == size):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['image']
+
+        if entry is not None:
+            self._remove(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: str, image: np.ndarray, mtime: int = None, size: int = None) -> None:
+        """
+            缓存图像，超出字节预算时按最久未使用顺序淘汰
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = {'image': image, 'mtime': mtime, 'size': size,
+                              'derived': dict(), 'nbytes': image.nbytes}
+        self._keys_by_id[id(image)] = key
+        self.nbytes += image.nbytes
+        self._evict()
+
+    def derived(self, image: np.ndarray) -> dict | None:
+        """
+            获取缓存图像的派生数据字典，图像不在缓存中时返回 None；使用派生数据同样算作最近使用
+        """
+        key = self._keys_by_id.get(id(image))
+        if key is None or self._entries[key]['image'] is not image:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]['derived']
+
+    def add_derived(self, image: np.ndarray, name, value, nbytes: int) -> None:
+        """
+            为缓存图像添加派生数据，并计入该条目的字节数
+        Args:
+            image (np.ndarray): 已缓存的图像
+            name: 派生数据的键
+            value: 派生数据
+            nbytes (int): 派生数据占用的字节数
+        """
+        key = self._keys_by_id.get(id(image))
+        if key is None or self._entries[key]['image'] is not image:
+            return
+        self._entries[key]['derived'][name] = value
+        self.grow_derived(image, nbytes)
+
+    def grow_derived(self, image: np.ndarray, nbytes: int) -> None:
+        """
+            已有的派生数据增长 (如预处理模板生成了金字塔层、尺度库、旋转库) 时，把新增字节数计入该条目，
+            超出预算时淘汰其他条目；图像已被淘汰时忽略
+        Args:
+            image (np.ndarray): 已缓存的图像
+            nbytes (int): 新增的字节数
+        """
+        key = self._keys_by_id.get(id(image))
+        if key is None or self._entries[key]['image'] is not image:
+            return
+        self._entries[key]['nbytes'] += nbytes
+        self.nbytes += nbytes
+        self._evict(keep=key)
+
+    def info(self) -> dict:
+        """
+            返回缓存统计：条目数、字节数、预算、命中/未命中/淘汰次数
+        """
+        return {'count': len(self._entries), 'nbytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self) -> None:
+        """
+            清空缓存 (统计计数保留)
+        """
+        self._entries.clear()
+        self._keys_by_id.clear()
+        self.nbytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._keys_by_id.pop(id(entry['image']), None)
+        self.nbytes -= entry['nbytes']
+
+    def _evict(self, keep: str = None) -> None:
+        # 淘汰最久未使用的条目，keep 指定的条目 (正在使用) 不淘汰
+        for key in list(self._entries):
+            if self.nbytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            self.evictions += 1
+
+
 class DataHeader:
     """
     数据头类，用于存储图像数据的元信息
+    Args:
+        max_cache_bytes (int): 图像缓存的字节预算，默认 256MB
     """
-    def __init__(self):
-        self._load_images = dict()
+    def __init__(self, max_cache_bytes: int = 256 * 1024 * 1024):
+        self.image_cache = ImageCache(max_cache_bytes)
 
     def hex_to_rgb(self, hex_color: str):
         """
@@ -78,28 +214,53 @@ class DataHeader:
         hex_color = hex_color.lstrip('#')
         return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-    def rgb_to_gray(self, image: np.ndarray) -> np.ndarray:
+    def has_alpha(self, image: Image.Image) -> bool:
         """
-        将 RGB 转灰度
+        判断 PIL 图像是否带透明信息 (alpha 通道或调色板透明色)
         """
-        return np.mean(image, axis=2).astype(np.float32)
+        return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+    def rgb_to_gray(self, image: np.ndarray, dtype: type = np.float32) -> np.ndarray:
+        """
+            将 RGB 转灰度 (三通道等权均值)
+            直接按通道累加，不经过 float64 中间结果；均值与通道顺序无关，BGR/BGRA 截图缓冲区也可直接传入。
+            注意: 保持原实现 np.mean 的等权灰度而不是 BT.601 加权灰度 (0.299R + 0.587G + 0.114B)，
+            使 NCC 得分、已编译模板库中的灰度与原来一致，也不需要区分通道顺序
+        Args:
+            image (np.ndarray): 图像数组 (H, W, C)，C >= 3
+            dtype (type): np.float32 返回灰度均值；
+                          np.uint16 返回三通道之和 (0 ~ 765)，即等权均值的定点表示 (放大 3 倍，没有舍入误差)，
+                          仅适用于 uint8 图像
+        Returns:
+            np.ndarray: 灰度平面 (H, W)
+        """
+        if dtype == np.uint16:
+            gray = np.add(image[..., 0], image[..., 1], dtype=np.uint16)
+            gray += image[..., 2]
+            return gray
+
+        gray = np.add(image[..., 0], image[..., 1], dtype=np.float32)
+        gray += image[..., 2]
+        gray *= np.float32(1 / 3)
+        return gray
 
     def image_to_numpy(self, image, to_rgb: bool = False) -> np.ndarray:
         """
-            将图像转换为 numpy 数组
+            将图像转换为 numpy 数组，截取通道和 BGR -> RGB 转换均返回视图，不复制数据
         Args:
             image: 图像对象
             to_rgb: 是否转换为 RGB 格式
         """
-        img_array = np.array(image)
+        img_array = np.asarray(image)
+
+        if to_rgb:
+            # BGR(A) -> RGB，步长为负的通道视图
+            return img_array[:, :, 2::-1]
+
         # 确保是三通道格式
         if img_array.shape[2] != 3:
             img_array = img_array[:, :, :3]
 
-        if to_rgb:
-            # BGR -> RGB
-            img_array = img_array[:, :, [2, 1, 0]]
-
         return img_array
 
     def cache_image(self, image_path: str, image: np.ndarray) -> None:
@@ -108,29 +269,47 @@ class DataHeader:
         Args:
             image_path (str): 图像文件路径
         """
-        self._load_images[image_path] = image
+        image_path = Path(image_path)
+        stat = image_path.stat() if image_path.exists() else None
+        self.image_cache.put(str(image_path), image,
+                             stat.st_mtime_ns if stat else None, stat.st_size if stat else None)
 
     def clear_cache_images(self) -> None:
         """
             清空缓存图像
         """
-        self._load_images.clear()
+        self.image_cache.clear()
 
-    def load_image(self, image_path: str) -> np.ndarray:
+    def cache_info(self) -> dict:
         """
-            加载图像
+            返回图像缓存统计：条目数、字节数、预算、命中/未命中/淘汰次数
+        """
+        return self.image_cache.info()
+
+    def load_image(self, image_path: str, alpha: bool = False) -> np.ndarray:
+        """
+            加载图像，文件修改 (mtime 或大小变化) 后会重新读取
         Args:
             image_path (str): 图像文件路径
+            alpha (bool): 是否保留透明通道，为 True 且图像带透明信息时返回 RGBA，
+                          找图时 alpha 作为掩码，透明像素不参与匹配
         Returns:
-            np.ndarray: 图像的 numpy 数组表示
+            np.ndarray: 图像的 numpy 数组表示 (只读，缓存中的图像被多处共享)
         """
-        if image_path in self._load_images:
-            return self._load_images[image_path]
         image_path = Path(image_path)
         if not image_path.exists():
             raise FileNotFoundError(f"文件不存在: {image_path}")
-        image_np = self._image_to_numpy(Image.open(image_path))
-        self.cache_image(str(image_path), image_np)
+        stat = image_path.stat()
+        key = f"{image_path}#alpha" if alpha else str(image_path)
+        image_np = self.image_cache.get(key, stat.st_mtime_ns, stat.st_size)
+        if image_np is not None:
+            return image_np
+
+        with Image.open(image_path) as image:
+            mode = 'RGBA' if alpha and self.has_alpha(image) else 'RGB'
+            image_np = np.array(image.convert(mode))
+        image_np.flags.writeable = False
+        self.image_cache.put(key, image_np, stat.st_mtime_ns, stat.st_size)
         return image_np
 
     def save_image(self, image: np.ndarray, image_path: str) -> None:
@@ -143,6 +322,55 @@ class DataHeader:
         image_path = Path(image_path).absolute()
         if not image_path.parent.is_dir():
             raise FileNotFoundError(f"目录不存在: {image_path.parent}")
-        Image.fromarray(image).save(image_path)
+        Image.fromarray(np.ascontiguousarray(image)).save(image_path)
 
 
+class IntegralImage:
+    """
+    积分图 (Summed-Area Table)，O(1) 求任意矩形区域的像素和
+    """
+    def __init__(self, image: np.ndarray):
+        """
+        Args:
+            image (np.ndarray): 二维数组 (如灰度平面或其平方)
+        """
+        height, width = image.shape[:2]
+        # 首行首列补零，使 table[y, x] = image[:y, :x].sum()
+        self.table = np.zeros((height + 1, width + 1), dtype=np.float64)
+        # 先沿行方向 (连续内存) 累加，再逐行向下累加；比 axis=0 的 cumsum 少一次跨步遍历
+        np.cumsum(image, axis=1, dtype=np.float64, out=self.table[1:, 1:])
+        for y in range(2, height + 1):
+            np.add(self.table[y], self.table[y - 1], out=self.table[y])
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """返回原图尺寸 (height, width)"""
+        return self.table.shape[0] - 1, self.table.shape[1] - 1
+
+    def region_sum(self, x1: int, y1: int, x2: int, y2: int) -> float:
+        """
+            求矩形区域 [x1, x2) × [y1, y2) 的像素和
+        """
+        t = self.table
+        return float(t[y2, x2] - t[y1, x2] - t[y2, x1] + t[y1, x1])
+
+    def box_sum(self, height: int, width: int) -> np.ndarray:
+        """
+            求所有 height × width 窗口的像素和 (与 valid 模式卷积的输出尺寸一致)
+        Args:
+            height (int): 窗口高度
+            width (int): 窗口宽度
+        Returns:
+            np.ndarray: 形状为 (H - height + 1, W - width + 1) 的窗口和
+        """
+        t = self.table
+        result = t[height:, width:] - t[:-height, width:]
+        result -= t[height:, :-width]
+        result += t[:-height, :-width]
+        return result
+
+    def box_mean(self, height: int, width: int) -> np.ndarray:
+        """
+            求所有 height × width 窗口的均值
+        """
+        return self.box_sum(height, width) / (height * width)
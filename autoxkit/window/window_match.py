@@ -1,13 +1,24 @@
 import mss
 import math
 import numpy as np
-from scipy import ndimage
-from scipy.signal import fftconvolve
 import ctypes
 from ctypes import wintypes
 from ctypes.wintypes import RECT
 
 from ..utils import RectTuple, DataHeader
+from ..match.fft import FFTEngine, get_engine
+from ..match.binary import BinaryTemplate
+from ..match.library import TemplateLibrary
+from ..match.ocr import GlyphDict
+from ..match.change import ChangeDetector
+from ..match.color import ColorSpec, color_key, compare_colors
+from ..match.prefilter import ColorPrefilter
+from ..match.record import FrameRecorder
+from ..match.snapshot import Snapshot
+from ..match.source import FrameSource
+from ..match.template import PreparedTemplate, TemplateCache
+from ..match.tiled import TiledNCC
+from ..match.tracker import Tracker
 
 class BITMAPINFOHEADER(ctypes.Structure):
     _fields_ = [
@@ -31,11 +42,28 @@ class BITMAPINFO(ctypes.Structure):
     ]
 
 class WindowMatch:
-    """窗口匹配类"""
-    def __init__(self, hwnd: int = None):
+    """
+        窗口匹配类
+    Args:
+        hwnd (int): 窗口句柄
+        source (FrameSource): 帧来源，默认通过 PrintWindow / BitBlt / mss 截取窗口。
+                              传入后 rect 均相对于帧来源的坐标系，不再需要窗口句柄。
+        fft (str | FFTEngine): 找图使用的 FFT 后端，'scipy' (默认)、'pyfftw' (需安装 pyfftw)、
+                               'auto' (已安装 pyfftw 时使用) 或 FFTEngine 实例，构造后不再改变。
+        fft_workers (int): FFT 并行线程数，默认单线程，-1 为全部 CPU 核。
+    """
+    def __init__(self, hwnd: int = None, source: FrameSource = None, fft: str | FFTEngine = 'scipy',
+                 fft_workers: int = None):
         self.hwnd = hwnd if hwnd else None
-        self.sct = mss.mss()
+        self.source = source
+        self.sct = mss.mss() if source is None else None
         self.data_header = DataHeader()
+        self.fft = get_engine(fft, fft_workers)
+        self.template_cache = TemplateCache(image_cache=self.data_header.image_cache, fft=self.fft)
+        self.recorder = None
+        self.change_detector = None
+        self.tiler = None
+        self.prefilter = None
         self.max_distance = math.sqrt(255**2 * 3)  # RGB 空间最大距离 ≈ 441.67
 
     def clear_cache_images(self) -> None:
@@ -43,16 +71,36 @@ class WindowMatch:
             清空缓存图像
         """
         self.data_header.clear_cache_images()
+        self.template_cache.clear()
 
-    def load_image(self, image_path: str) -> np.ndarray:
+    def cache_info(self) -> dict:
+        """
+            返回图像缓存统计：条目数、字节数、预算、命中/未命中/淘汰次数
+        """
+        return self.data_header.cache_info()
+
+    def load_image(self, image_path: str, alpha: bool = False) -> np.ndarray:
         """
             加载图像
         Args:
             image_path (str): 图像文件路径
+            alpha (bool): 是否保留透明通道，带透明信息的图像返回 RGBA，找图时透明像素不参与匹配
         Returns:
             np.ndarray: 图像的 numpy 数组表示
         """
-        return self.data_header.load_image(image_path)
+        return self.data_header.load_image(image_path, alpha)
+
+    def load_library(self, path: str) -> TemplateLibrary:
+        """
+            加载由 build_library 编译的模板库，文件以内存映射方式按需读取，不解码图片
+        Args:
+            path (str): 模板库文件路径
+        Returns:
+            TemplateLibrary: 模板库，library[name] 返回可直接用于找图的模板图像
+        """
+        library = TemplateLibrary(path)
+        self.template_cache.add_library(library)
+        return library
 
     def save_image(self, image: np.ndarray, image_path: str) -> None:
         """
@@ -73,6 +121,14 @@ class WindowMatch:
         Returns:
             np.ndarray: 截图图像的 numpy 数组表示。
         """
+        if self.source is not None:
+            img_array = self.source.grab(RectTuple(*rect) if rect is not None else None)
+            if self.recorder is not None:
+                self.recorder.write(img_array, rect)
+            if save_path:
+                self.data_header.save_image(img_array, save_path)
+            return img_array
+
         if not self.hwnd:
             raise ValueError("窗口句柄未设置")
 
@@ -90,6 +146,8 @@ class WindowMatch:
                 img_array = method(rect)
                 # 检查是否为纯黑图像
                 if not self._is_black_image(img_array):
+                    if self.recorder is not None:
+                        self.recorder.write(img_array, rect)
                     # 保存截图（如果指定了路径）
                     if save_path:
                         self.data_header.save_image(img_array, save_path)
@@ -100,6 +158,27 @@ class WindowMatch:
 
         raise Exception(f"所有截图方法都失败: {last_error}")
 
+    def start_recording(self, path: str, chunk_size: int = 256 * 1024 * 1024) -> FrameRecorder:
+        """
+            开始录制，之后每次截图的图像、区域和时间戳都会追加写入录制目录，可用 ReplayFrameSource 回放
+        Args:
+            path (str): 录制目录
+            chunk_size (int): 单个分块文件的最大字节数，默认 256MB
+        Returns:
+            FrameRecorder: 录制器
+        """
+        self.stop_recording()
+        self.recorder = FrameRecorder(path, chunk_size)
+        return self.recorder
+
+    def stop_recording(self) -> None:
+        """
+            停止录制
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
     def _is_black_image(self, img_array: np.ndarray, threshold: int = 10, ratio: float = 0.95) -> bool:
         """
             检查图像是否为纯黑或接近纯黑
@@ -348,6 +427,76 @@ class WindowMatch:
         screen_image = self.data_header.image_to_numpy(screen_image, to_rgb=True)
         return screen_image
 
+    def enable_change_gating(self, block_size: int = 16, tolerance: float = 0.0) -> ChangeDetector:
+        """
+            开启帧差门控：match_image、find_all、find_color / find_colors 会记录每个区域的分块指纹，
+            区域内容未变化时直接返回上一次的结果，不再重新计算
+        Args:
+            block_size (int): 指纹分块边长 (像素)，默认 16
+            tolerance (float): 分块内每像素平均变化不超过 tolerance 时视为未变化，默认 0 (按分块内容哈希判断，任何变化都失效)；
+                               大于 0 时按分块和判断，块内移动等总和不变的变化不会使缓存失效
+        Returns:
+            ChangeDetector: 变化检测器，可通过 changed_blocks(rect) / changed_rects(rect) 查看变化的分块
+        """
+        self.change_detector = ChangeDetector(block_size, tolerance)
+        return self.change_detector
+
+    def disable_change_gating(self) -> None:
+        """
+            关闭帧差门控
+        """
+        self.change_detector = None
+
+    def enable_tiling(self, tile_size: int = 1024, workers: int = None) -> TiledNCC:
+        """
+            开启分块并行 NCC：match_image 的整图搜索把源图切分为重叠分块，在线程池中并行计算，
+            适合 4K 等超大区域，降低峰值内存并利用多核；结果与未分块时一致
+        Args:
+            tile_size (int): 每个分块负责的结果区域边长 (像素)，默认 1024
+            workers (int): 线程数，默认为 CPU 核数
+        Returns:
+            TiledNCC: 分块计算器，stats 中记录最近一次的分块数、线程数和峰值内存估算
+        """
+        self.disable_tiling()
+        self.tiler = TiledNCC(tile_size, workers)
+        return self.tiler
+
+    def disable_tiling(self) -> None:
+        """
+            关闭分块并行 NCC
+        """
+        if self.tiler is not None:
+            self.tiler.close()
+            self.tiler = None
+
+    def enable_prefilter(self, bins: int = 4, tolerance: float = 0.3) -> ColorPrefilter:
+        """
+            开启颜色直方图预筛选：match_image / find_all 先比较区域与模板的量化颜色直方图，
+            模板颜色在区域中明显不存在时直接返回未找到，跳过 FFT 找图
+        Args:
+            bins (int): 每个通道的量化级数，默认 4
+            tolerance (float): 允许在区域中找不到对应颜色的模板像素比例，默认 0.3
+        Returns:
+            ColorPrefilter: 预筛选器，info() 返回拒绝率和放行命中率
+        """
+        self.prefilter = ColorPrefilter(bins, tolerance)
+        return self.prefilter
+
+    def disable_prefilter(self) -> None:
+        """
+            关闭颜色直方图预筛选
+        """
+        self.prefilter = None
+
+    def _query(self, rect: tuple[int, int, int, int], key: tuple, compute, ref=None):
+        """
+        截图一次并执行查询，开启帧差门控时区域未变化则返回缓存结果
+        """
+        snapshot = self.snapshot(rect)
+        if self.change_detector is None:
+            return compute(snapshot)
+        return self.change_detector.query(snapshot, key, compute, ref)
+
     def get_pixel_color(self, x: int, y: int, is_return_hex: bool = False) -> str | tuple:
         """
             获取窗口坐标 (x, y) 处的颜色
@@ -358,155 +507,266 @@ class WindowMatch:
         Returns:
             str | tuple: 十六进制格式字符串，如 #FFAABB 或 (r, g, b) 元组
         """
-        if not self.hwnd:
-            raise ValueError("窗口句柄未设置")
-
         pixel = tuple(int(c) for c in self.screenshot(rect=(x, y, x+1, y+1))[0][0])
 
         if is_return_hex:   # 返回十六进制字符串
             return f"#{pixel[0]:02X}{pixel[1]:02X}{pixel[2]:02X}"
         return pixel    # 返回 RGB 元组
 
-    def match_color(self, source_color: str | tuple, target_color: str | tuple, similarity: float = 0.8) -> tuple:
+    def match_color(self, source_color: str | tuple | ColorSpec, target_color: str | tuple | ColorSpec,
+                    similarity: float = 0.8) -> tuple:
         """
             匹配颜色
         Args:
-            source_color (str | tuple): 源颜色 (str: 颜色十六进制字符串， tuple: (r, g, b) | (x, y))
-            target_color (str | tuple): 目标颜色 (str: 颜色十六进制字符串， tuple: (r, g, b) | (x, y))
-            similarity (float): 相似度阈值，取值范围 0.0 ~ 1.0，越接近 1 越严格。默认值为 0.8。
+            source_color (str | tuple | ColorSpec): 源颜色 (str: 颜色十六进制字符串， tuple: (r, g, b) | (x, y))
+            target_color (str | tuple | ColorSpec): 目标颜色 (str: 颜色十六进制字符串或偏色字符串 'FFAABB-0A0514'，
+                                                    tuple: (r, g, b) | (x, y)，ColorSpec: 颜色规则)
+            similarity (float): 相似度阈值，取值范围 0.0 ~ 1.0，越接近 1 越严格。默认值为 0.8。目标为颜色规则时忽略。
         Returns:
-            tuple: bool(True | False), float(相似度结果值)
+            tuple: bool(True | False), float(相似度结果值，颜色规则时为与最接近的规则颜色的相似度)
         """
-        if type(source_color) is str:
-            source_color = self.data_header.hex_to_rgb(source_color)
-        elif type(source_color) is tuple and len(source_color) == 2:
+        if type(source_color) is tuple and len(source_color) == 2:
             source_color = self.get_pixel_color(*source_color, is_return_hex=False)
-
-        if type(target_color) is str:
-            target_color = self.data_header.hex_to_rgb(target_color)
-        elif type(target_color) is tuple and len(target_color) == 2:
+        if type(target_color) is tuple and len(target_color) == 2:
             target_color = self.get_pixel_color(*target_color, is_return_hex=False)
 
-        # 计算欧几里得距离
-        distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(source_color, target_color)))
-        score = 1 - (distance / self.max_distance)
-        return score >= similarity, round(score, 3)
+        # 任一方为颜色规则 (或偏色字符串) 时按逐通道容差判断，否则按欧几里得距离的相似度判断
+        return compare_colors(source_color, target_color, similarity)
 
-    def match_image(self, target_image: np.ndarray=None, rect: tuple[int, int, int, int]=None,
-                    similarity: float=0.8):
+    def snapshot(self, rect: tuple[int, int, int, int]=None) -> Snapshot:
         """
-            匹配图像
+            截图一次并返回快照，之后的取色、比色、找色、找图都在内存中完成
         Args:
-            target_image (np.ndarray): 目标图像
-            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认匹配整个窗口。
-            similarity (float): 相似度阈值，默认 0.8。
+            rect (tuple, None): 矩形区域元组，应包含 (x1, y1, x2, y2)，相对于窗口左上角。
+                                   如果为 None，则截取整个窗口。
         Returns:
-            tuple[tuple[int, int], float]: 匹配结果元组，包含匹配位置和相似度。
+            Snapshot: 快照对象，坐标均为窗口坐标
         """
-        if not self.hwnd:
-            raise ValueError("窗口句柄未设置")
+        rect = RectTuple(*rect) if rect is not None else None
+        origin = (rect.x1, rect.y1) if rect is not None else (0, 0)
+        return Snapshot(self.screenshot(rect), origin, self.template_cache, self.tiler, self.prefilter)
 
-        # 检查参数
-        if target_image is None:
-            raise ValueError("必须提供 target_image 参数")
-
-        # 截取屏幕区域
-        rect = RectTuple(*rect) if rect is not None else RectTuple(0, 0, self.size[0], self.size[1])
-        source_image = self.screenshot(rect)
-
-        # 转换为 float32 精度
-        source_image = np.array(source_image, dtype=np.float32)
-        target_image = np.array(target_image, dtype=np.float32)
+    def find_color(self, rect: tuple[int, int, int, int]=None, color: str | tuple=None,
+                   similarity: float=0.8, mode: str='first'):
+        """
+            在区域内找色，整块区域一次性向量化比较
+        Args:
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认搜索整个窗口。
+            color (str | tuple | ColorSpec): 目标颜色 (str: 颜色十六进制字符串或偏色字符串， tuple: (r, g, b)， ColorSpec: 颜色规则)
+            similarity (float): 相似度阈值，与 match_color 的相似度含义一致，默认 0.8。
+            mode (str): 'first' 返回首个命中坐标 (x, y)，未找到返回 (False, False)；
+                        'all' 返回所有命中坐标列表；'mask' 返回区域大小的布尔掩码。默认 'first'。
+        Returns:
+            tuple | list | np.ndarray: 由 mode 决定，坐标为窗口坐标
+        """
+        if color is None:
+            raise ValueError("必须提供 color 参数")
+        return self.find_colors(rect, [color], similarity, mode)
 
-        # 调用匹配方法
-        (x, y), sim = self._match_ncc(source_image, target_image, similarity)
+    def find_colors(self, rect: tuple[int, int, int, int]=None, colors: list[str | tuple]=None,
+                    similarity: float=0.8, mode: str='first'):
+        """
+            在区域内查找与任一颜色相似的像素，整块区域一次性向量化比较
+        Args:
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认搜索整个窗口。
+            colors (list): 目标颜色列表，元素为十六进制字符串、(r, g, b) 元组或颜色规则 (ColorSpec / 偏色字符串)
+            similarity (float): 相似度阈值，与 match_color 的相似度含义一致，默认 0.8。
+            mode (str): 'first' 返回首个命中坐标 (x, y)，未找到返回 (False, False)；
+                        'all' 返回所有命中坐标列表；'mask' 返回区域大小的布尔掩码。默认 'first'。
+        Returns:
+            tuple | list | np.ndarray: 由 mode 决定，坐标为窗口坐标
+        """
+        if not colors:
+            raise ValueError("必须提供 colors 参数")
 
-        # 调整坐标以对应窗口坐标
-        if x is not False and y is not False:
-            x, y = x + rect.x1, y + rect.y1
-            return (int(x), int(y)), sim
-        else:
-            return (False, False), sim
+        key = ('find_colors', tuple(color_key(color) for color in colors), similarity, mode)
+        return self._query(rect, key, lambda snapshot: snapshot.find_colors(None, colors, similarity, mode))
 
-    def _match_ncc(self, source_image: np.ndarray, target_image: np.ndarray,
-                   similarity: float = 0.8) -> tuple[tuple, float]:
+    def find_multi_color(self, rect: tuple[int, int, int, int]=None, base_color: str | tuple=None,
+                         offsets_and_colors: list[tuple[int, int, str | tuple]]=None,
+                         similarity: float=0.8, mode: str='all'):
         """
-        简介:
-            使用 FFT 加速的归一化互相关(NCC)方法匹配图像 (灰度)，并使用边缘检测进行二次验证。
-
-        性能参考:
-            性能为 0.006秒 ~ 0.2秒 ~ 0.6秒 之间，取决于图像大小。
-            0.006秒 = source_image: 300x300, target_image: 100x100
-            0.2  秒 = source_image: 2560x1440, target_image: 100x100
-            0.6  秒 = source_image: 2560x1440, target_image: 2460x1340
+            多点找色：查找基准点颜色匹配、且各偏移点颜色也都匹配的位置
+        Args:
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认搜索整个窗口。
+            base_color (str | tuple | ColorSpec): 基准点颜色 (str: 颜色十六进制字符串或偏色字符串， tuple: (r, g, b)， ColorSpec: 颜色规则)
+            offsets_and_colors (list): 偏移点列表 [(dx, dy, color), ...]，偏移相对于基准点
+            similarity (float): 相似度阈值，与 match_color 的相似度含义一致，默认 0.8。
+            mode (str): 'all' 返回所有基准点坐标列表；'first' 返回首个基准点坐标 (x, y)，
+                        未找到返回 (False, False)；'mask' 返回区域大小的布尔掩码。默认 'all'。
+        Returns:
+            list | tuple | np.ndarray: 由 mode 决定，坐标为窗口坐标
         """
+        if base_color is None or offsets_and_colors is None:
+            raise ValueError("必须提供 base_color 和 offsets_and_colors 参数")
 
-        # 转灰度
-        s_channel = self.data_header.rgb_to_gray(source_image)
-        t_channel = self.data_header.rgb_to_gray(target_image)
+        # 只截图一次
+        return self.snapshot(rect).find_multi_color(None, base_color, offsets_and_colors, similarity, mode)
 
-        # 模板能量
-        t_norm = np.linalg.norm(t_channel)
-        if t_norm == 0:
-            return False, 0.0
+    def read_text(self, glyphs: GlyphDict=None, rect: tuple[int, int, int, int]=None,
+                  colors: list[str | tuple]=None, similarity: float=0.8,
+                  unknown: str='', space_gap: int=None) -> str:
+        """
+            按字库识别区域内的单行文字 (数字、计数器、计时器、短标签)：
+            按文字颜色二值化，列投影切分字符，与字库点阵比较汉明距离，不做 FFT
+        Args:
+            glyphs (GlyphDict): 字库
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认识别整个窗口。
+            colors (list): 文字颜色列表，元素为十六进制字符串或 (r, g, b) 元组
+            similarity (float): 颜色相似度阈值，与 match_color 的相似度含义一致，默认 0.8。
+            unknown (str): 无法识别的字符替换为该字符串，默认丢弃。
+            space_gap (int): 相邻字符间空白列数不小于该值时插入空格，默认不插入。
+        Returns:
+            str: 识别结果
+        """
+        # 检查参数
+        if glyphs is None or not colors:
+            raise ValueError("必须提供 glyphs 和 colors 参数")
 
-        # 计算分子：互相关 (FFT 卷积)
-        numerator = fftconvolve(s_channel, np.flipud(np.fliplr(t_channel)), mode='valid')
+        key = ('read_text', id(glyphs), glyphs.version, tuple(color_key(color) for color in colors),
+               similarity, unknown, space_gap)
+        return self._query(rect, key, lambda snapshot: snapshot.read_text(
+            glyphs, None, colors, similarity, unknown, space_gap), glyphs)
 
-        # 计算分母：局部能量 × 模板能量
-        s_squared = fftconvolve(s_channel**2, np.ones_like(t_channel), mode='valid')
-        denominator = np.sqrt(s_squared) * t_norm
+    def prepare_template(self, image: np.ndarray, source_shape: tuple[int, int],
+                         mask: np.ndarray = None) -> PreparedTemplate:
+        """
+            预处理模板，缓存灰度图、模板能量、FFT 频谱和边缘图，供重复匹配使用
+        Args:
+            image (np.ndarray): 模板图像 (RGB，或 alpha 作为掩码的 RGBA)
+            source_shape (tuple): 源图 (搜索区域) 尺寸 (height, width)
+            mask (np.ndarray): 模板掩码，不提供时使用 RGBA 模板的 alpha 通道
+        Returns:
+            PreparedTemplate: 预处理模板
+        """
+        return self.template_cache.get(image, source_shape, mask)
 
-        denominator[denominator == 0] = 1e-8  # 避免除零
+    def match_image(self, target_image: np.ndarray | PreparedTemplate=None, rect: tuple[int, int, int, int]=None,
+                    similarity: float=0.8, pyramid_levels: int=0, mask: np.ndarray=None,
+                    scales: list[float]=None, zero_mean: bool=False, rotations: list[float] | int=None):
+        """
+            匹配图像
+        Args:
+            target_image (np.ndarray | PreparedTemplate): 目标图像或预处理模板
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认匹配整个窗口。
+            similarity (float): 相似度阈值，默认 0.8。
+            pyramid_levels (int): 金字塔层数，大于 0 时先在缩小 2**pyramid_levels 倍的图像上粗搜，
+                                  再在候选附近做全分辨率匹配。默认 0 (整图搜索)。
+            mask (np.ndarray): 模板掩码 (与模板同尺寸，bool 或 0 ~ 1 权重，uint8 按 0 ~ 255 换算)，
+                               只有掩码内的像素参与匹配。不提供时使用 RGBA 模板的 alpha 通道。
+            scales (list[float]): 缩放比例列表，如 [1.0, 1.25, 1.5] 对应不同的 DPI 缩放。
+                                  提供时在缓存的尺度库中搜索，返回 (匹配位置, 缩放比例, 相似度)。
+            zero_mean (bool): 是否使用去均值 NCC (TM_CCOEFF_NORMED 式)，对亮度偏移不敏感、平坦区域不会得高分，
+                              得分区分度足够，因此跳过边缘验证。模板本身为纯色时无法使用。默认 False。
+            rotations (list[float] | int): 逆时针旋转角度列表 (度)，或整数 n 表示每 360 / n 度一个角度，
+                                           适合小地图箭头、旋转图标等任意朝向的目标。提供时只用模板中心的内切圆匹配，
+                                           各角度的旋转模板 (掩码、频谱) 缓存在旋转库中，所有角度共用一次源图 FFT，
+                                           返回 (匹配位置, 旋转角度, 相似度)。不能与 scales 同时使用。
+        Returns:
+            tuple[tuple[int, int], float]: 匹配结果元组，包含匹配位置和相似度；
+                                           提供 scales 时为 (匹配位置, 缩放比例, 相似度)，
+                                           提供 rotations 时为 (匹配位置, 旋转角度, 相似度)。
+        """
+        # 检查参数
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
 
-        ncc = numerator / denominator
+        key = ('match_image', id(target_image), id(mask), similarity, pyramid_levels,
+               tuple(scales) if scales is not None else None, zero_mean,
+               rotations if rotations is None or isinstance(rotations, int) else tuple(rotations))
+        return self._query(rect, key, lambda snapshot: snapshot.match_image(
+            target_image, None, similarity, pyramid_levels, mask, scales, zero_mean, rotations),
+            (target_image, mask))
 
-        # 找到最佳匹配位置
-        max_sim = np.max(ncc)
-        if max_sim >= similarity:
-            # 左上角坐标
-            y, x = np.unravel_index(np.argmax(ncc), ncc.shape)
-            h, w = target_image.shape[:2]
+    def match_images(self, templates: list[np.ndarray | PreparedTemplate]=None, rect: tuple[int, int, int, int]=None,
+                     similarity: float=0.8, zero_mean: bool=False) -> list[tuple[tuple, float]]:
+        """
+            在同一区域内批量匹配多张图像，只截图一次，源图 FFT 也只计算一次
+        Args:
+            templates (list): 目标图像或预处理模板列表
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认匹配整个窗口。
+            similarity (float): 相似度阈值，默认 0.8。
+            zero_mean (bool): 是否使用去均值 NCC，同 match_image。
+        Returns:
+            list[tuple[tuple[int, int], float]]: 与 templates 一一对应的匹配结果列表。
+        """
+        # 检查参数
+        if templates is None:
+            raise ValueError("必须提供 templates 参数")
 
-            # 确保提取区域在源图像范围内
-            if y + h <= source_image.shape[0] and x + w <= source_image.shape[1]:
-                # 提取匹配区域
-                matched_region = source_image[y:y+h, x:x+w]
+        return self.snapshot(rect).match_images(templates, None, similarity, zero_mean)
 
-                # 边缘检测二次验证
-                target_edges = self._edge_detection(target_image)
-                matched_edges = self._edge_detection(matched_region)
+    def match_binary(self, target_image: np.ndarray | BinaryTemplate=None, rect: tuple[int, int, int, int]=None,
+                     similarity: float=0.9, colors: list[str | tuple]=None, color_similarity: float=0.8,
+                     threshold: float=128, mask: np.ndarray=None) -> tuple[tuple, float]:
+        """
+            二值匹配：按颜色或亮度把源图和模板二值化，按位打包 (每像素 1 位) 后以异或 + 位计数比较，
+            失配位数超过预算的候选提前淘汰。适合文字、平坦背景上的图标等高对比度界面，小模板时比 FFT 找图快
+        Args:
+            target_image (np.ndarray | BinaryTemplate): 目标图像 (RGB / RGBA / 布尔数组) 或二值模板
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认搜索整个窗口。
+            similarity (float): 相似度阈值，相似度为 1 - 失配像素数 / 参与比较的像素数，默认 0.9。
+            colors (list): 前景颜色列表，提供时与任一颜色相似的像素为前景，否则按亮度二值化。
+            color_similarity (float): 颜色相似度阈值，与 match_color 的相似度含义一致，默认 0.8。
+            threshold (float): 亮度阈值 (0 ~ 255)，灰度不低于该值的像素为前景，默认 128。
+            mask (np.ndarray): 模板掩码 (布尔，与模板同尺寸)，False 的像素不参与比较。
+                               不提供时使用 RGBA 模板的 alpha 通道。
+        Returns:
+            tuple[tuple[int, int], float]: 匹配位置和相似度，未找到时位置为 (False, False)。
+        """
+        # 检查参数
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
 
-                # 计算边缘相似度
-                edge_numerator = np.sum(target_edges * matched_edges)
-                edge_denominator = np.sqrt(np.sum(target_edges**2) * np.sum(matched_edges**2))
-                edge_denominator = max(edge_denominator, 1e-8)  # 避免除零
-                edge_sim = edge_numerator / edge_denominator
+        key = ('match_binary', id(target_image), id(mask), similarity,
+               tuple(color_key(color) for color in colors) if colors else None, color_similarity, threshold)
+        return self._query(rect, key, lambda snapshot: snapshot.match_binary(
+            target_image, None, similarity, colors, color_similarity, threshold, mask), (target_image, mask))
 
-                # 只有当边缘相似度也达到阈值时，才认为匹配成功
-                if edge_sim >= similarity:
-                    # 中心坐标
-                    center_x = x + w // 2
-                    center_y = y + h // 2
-                    return (int(center_x), int(center_y)), round(float(max_sim), 3)
+    def find_all(self, target_image: np.ndarray | PreparedTemplate=None, rect: tuple[int, int, int, int]=None,
+                 similarity: float=0.8, max_results: int=None, min_distance: int=None,
+                 mask: np.ndarray=None, zero_mean: bool=False) -> list[tuple[tuple, float]]:
+        """
+            查找区域内所有匹配的图像，只计算一次 NCC 结果图并做非极大值抑制
+        Args:
+            target_image (np.ndarray | PreparedTemplate): 目标图像或预处理模板
+            rect (tuple): 矩形区域元组，应包含 (x1, y1, x2, y2)，不提供时默认匹配整个窗口。
+            similarity (float): 相似度阈值，默认 0.8。
+            max_results (int): 最多返回数量，默认不限。
+            min_distance (int): 两个匹配之间的最小距离 (像素)，默认取模板短边的一半。
+            mask (np.ndarray): 模板掩码 (与模板同尺寸，bool 或 0 ~ 1 权重，uint8 按 0 ~ 255 换算)，
+                               只有掩码内的像素参与匹配。不提供时使用 RGBA 模板的 alpha 通道。
+            zero_mean (bool): 是否使用去均值 NCC，同 match_image。
+        Returns:
+            list[tuple[tuple[int, int], float]]: 匹配位置 (窗口坐标) 和相似度列表，按相似度降序。
+        """
+        # 检查参数
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
 
-        return (False, False), round(float(max_sim), 3)
+        key = ('find_all', id(target_image), id(mask), similarity, max_results, min_distance, zero_mean)
+        return self._query(rect, key, lambda snapshot: snapshot.find_all(
+            target_image, None, similarity, max_results, min_distance, mask, zero_mean), (target_image, mask))
 
-    def _edge_detection(self, image: np.ndarray) -> np.ndarray:
+    def track(self, target_image: np.ndarray | PreparedTemplate=None, rect: tuple[int, int, int, int]=None,
+              similarity: float=0.8, radius: int=16, pyramid_levels: int=0, mask: np.ndarray=None,
+              zero_mean: bool=False) -> Tracker:
         """
-        使用 Sobel 算子进行边缘检测
+            创建跟踪器：每次 tracker.update() 先在上次命中位置附近直接计算 NCC，
+            未命中时才回退到整块区域的 FFT 搜索，tracker.hit_rate 为快速路径命中率
+        Args:
+            target_image (np.ndarray | PreparedTemplate): 目标图像或预处理模板
+            rect (tuple): 整块搜索区域 (x1, y1, x2, y2)，不提供时默认整个窗口。
+            similarity (float): 相似度阈值，默认 0.8。
+            radius (int): 快速路径在上次位置周围的搜索半径 (像素)，默认 16。
+            pyramid_levels (int): 回退到整块搜索时使用的金字塔层数，默认 0。
+            mask (np.ndarray): 模板掩码，同 match_image。
+            zero_mean (bool): 是否使用去均值 NCC，同 match_image。
+        Returns:
+            Tracker: 跟踪器
         """
-        # 转灰度
-        if len(image.shape) == 3:
-            gray = self.data_header.rgb_to_gray(image)
-        else:
-            gray = image
-
-        # Sobel 边缘检测
-        sobel_x = ndimage.sobel(gray, axis=0, mode='constant')
-        sobel_y = ndimage.sobel(gray, axis=1, mode='constant')
-        edges = np.sqrt(sobel_x**2 + sobel_y**2)
+        # 检查参数
+        if target_image is None:
+            raise ValueError("必须提供 target_image 参数")
 
-        # 归一化
-        edges = edges / (np.max(edges) + 1e-8)
-        return edges
+        return Tracker(self, target_image, rect, similarity, radius, pyramid_levels, mask, zero_mean)
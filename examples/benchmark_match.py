@@ -0,0 +1,399 @@
+"""
+图像匹配性能基准，使用合成图像运行，无需显示器。
+
+python examples/benchmark_match.py
+"""
+import time
+import tracemalloc
+import numpy as np
+from scipy import ndimage
+from scipy.signal import fftconvolve
+
+from autoxkit.match import Match, FrameSource, TiledNCC, FFTEngine, get_engine
+from autoxkit.match.ncc import ncc_map, match_ncc
+from autoxkit.match.pyramid import match_pyramid
+from autoxkit.match.template import PreparedTemplate
+from autoxkit.utils import DataHeader, IntegralImage
+
+
+def make_image(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """生成带平滑纹理的合成 RGB 图像 (float32)"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (height, width, 3)).astype(np.float32)
+    return ndimage.gaussian_filter(image, (2, 2, 0))
+
+
+def timeit(func, repeat: int = 5) -> float:
+    """返回多次运行中的最短耗时 (毫秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def local_energy_benchmark():
+    """局部能量：fftconvolve 与积分图对比"""
+    print("== 局部能量 (分母) ==")
+    gray = DataHeader().rgb_to_gray(make_image(1440, 2560))
+    for th, tw in [(100, 100), (1340, 2460)]:
+        ones = np.ones((th, tw), dtype=np.float32)
+        t_fft = timeit(lambda: fftconvolve(gray**2, ones, mode='valid'))
+        t_sat = timeit(lambda: IntegralImage(np.square(gray, dtype=np.float64)).box_sum(th, tw))
+        print(f"2560x1440 / {tw}x{th}: fftconvolve {t_fft:8.1f} ms, 积分图 {t_sat:6.1f} ms, "
+              f"加速 {t_fft / t_sat:5.1f}x")
+
+
+def ncc_benchmark():
+    """完整 NCC 结果图：原实现 (两次 fftconvolve) 与当前实现对比"""
+    print("== NCC 结果图 ==")
+    data_header = DataHeader()
+    source = make_image(1440, 2560)
+    s_channel = data_header.rgb_to_gray(source)
+    for th, tw in [(100, 100), (1340, 2460)]:
+        target = source[100:100 + th, 50:50 + tw]
+        t_channel = data_header.rgb_to_gray(target)
+
+        def baseline():
+            numerator = fftconvolve(s_channel, t_channel[::-1, ::-1], mode='valid')
+            s_squared = fftconvolve(s_channel**2, np.ones_like(t_channel), mode='valid')
+            return numerator / (np.sqrt(s_squared) * np.linalg.norm(t_channel) + 1e-8)
+
+        template = PreparedTemplate(target, s_channel.shape)
+        t_base = timeit(baseline)
+        t_new = timeit(lambda: ncc_map(s_channel, template))
+        print(f"2560x1440 / {tw}x{th}: 原实现 {t_base:8.1f} ms, 当前 {t_new:8.1f} ms, "
+              f"加速 {t_base / t_new:5.1f}x")
+
+
+def pyramid_benchmark(cases: int = 20, levels: int = 2):
+    """金字塔搜索：与整图穷举在合成图像集上的一致性和耗时"""
+    print(f"== 金字塔搜索 (levels={levels}) ==")
+    rng = np.random.default_rng(1)
+    source = make_image(1440, 2560, seed=1)
+    t_full = t_pyr = 0.0
+    max_offset = max_score_diff = 0.0
+    for _ in range(cases):
+        th, tw = rng.integers(40, 160, 2)
+        y, x = rng.integers(0, 1440 - th), rng.integers(0, 2560 - tw)
+        # 目标区域加入少量噪声，模拟真实截图
+        target = source[y:y + th, x:x + tw] + rng.normal(0, 4, (th, tw, 3)).astype(np.float32)
+        template = PreparedTemplate(target, source.shape)
+
+        start = time.perf_counter()
+        full = match_ncc(source, template, 0.8)
+        t_full += time.perf_counter() - start
+        start = time.perf_counter()
+        pyr = match_pyramid(source, template, 0.8, levels)
+        t_pyr += time.perf_counter() - start
+
+        if full[0][0] is not False and pyr[0][0] is not False:
+            max_offset = max(max_offset, abs(full[0][0] - pyr[0][0]), abs(full[0][1] - pyr[0][1]))
+        elif full[0] != pyr[0]:
+            max_offset = float('inf')
+        max_score_diff = max(max_score_diff, abs(full[1] - pyr[1]))
+
+    print(f"{cases} 组: 整图 {t_full / cases * 1000:7.1f} ms/次, 金字塔 {t_pyr / cases * 1000:7.1f} ms/次, "
+          f"最大位置偏差 {max_offset} px, 最大相似度偏差 {max_score_diff:.3f}")
+
+
+class BgraFrameSource(FrameSource):
+    """模拟 mss 截图：从 BGRA 缓冲区取帧"""
+    def __init__(self, bgra: np.ndarray):
+        self.bgra = bgra
+        self.data_header = DataHeader()
+
+    def grab(self, rect=None):
+        if rect is not None:
+            bgra = self.bgra[rect[1]:rect[3], rect[0]:rect[2]]
+        else:
+            bgra = self.bgra
+        return self.data_header.image_to_numpy(bgra, to_rgb=True)
+
+
+def traced(func) -> tuple[float, float]:
+    """返回 (耗时 ms, 峰值额外内存 MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def conversion_benchmark():
+    """截图缓冲区到灰度平面的转换：原实现与当前实现的内存分配对比"""
+    print("== 颜色转换 (2560x1440 BGRA) ==")
+    data_header = DataHeader()
+    rgb = make_image(1440, 2560).astype(np.uint8)
+    bgra = np.concatenate([rgb[:, :, ::-1], np.full((1440, 2560, 1), 255, np.uint8)], axis=2)
+
+    def baseline():
+        # 原实现：复制缓冲区 -> 花式索引复制 RGB -> float32 复制 -> float64 均值 -> float32
+        image = np.array(bgra)[:, :, :3][:, :, [2, 1, 0]]
+        image = np.array(image, dtype=np.float32)
+        return np.mean(image, axis=2).astype(np.float32)
+
+    def current():
+        image = data_header.image_to_numpy(bgra, to_rgb=True)
+        return data_header.rgb_to_gray(image)
+
+    for name, func in [('原实现', baseline), ('当前', current)]:
+        elapsed, peak = traced(func)
+        print(f"{name}: {elapsed:6.1f} ms, 峰值额外内存 {peak:6.1f} MB")
+
+    match = Match(BgraFrameSource(bgra))
+    target = rgb[300:400, 500:600].copy()
+    match.match_image(target, (0, 0, 2560, 1440))     # 预热模板缓存
+    elapsed, peak = traced(lambda: match.match_image(target, (0, 0, 2560, 1440)))
+    print(f"match_image 整条路径 (100x100 模板): {elapsed:6.1f} ms, 峰值额外内存 {peak:6.1f} MB")
+
+
+def fft_backend_benchmark():
+    """FFT 后端：fftconvolve 默认路径与各 FFTEngine 配置在 _match_ncc 文档参考尺寸及质数尺寸上的对比"""
+    print("== FFT 后端 (完整 NCC 结果图) ==")
+    engines = [
+        ('scipy 不补齐', FFTEngine(fast_len=False)),
+        ('scipy', FFTEngine()),
+        ('scipy workers=-1', FFTEngine(workers=-1)),
+    ]
+    try:
+        engines.append(('pyfftw', get_engine('pyfftw')))
+    except ImportError:
+        print("(未安装 pyfftw，跳过 pyfftw 后端)")
+
+    # 前三组为 _match_ncc 文档中的参考尺寸，最后一组宽高为质数
+    for (sh, sw), (th, tw) in [((300, 300), (100, 100)), ((1440, 2560), (100, 100)),
+                               ((1440, 2560), (1340, 2460)), ((1433, 2557), (101, 97))]:
+        source = make_image(sh, sw)
+        s_channel = DataHeader().rgb_to_gray(source)
+        target = source[:th, :tw]
+        t_channel = DataHeader().rgb_to_gray(target)
+
+        def baseline():
+            numerator = fftconvolve(s_channel, t_channel[::-1, ::-1], mode='valid')
+            s_squared = fftconvolve(s_channel**2, np.ones_like(t_channel), mode='valid')
+            return numerator / (np.sqrt(s_squared) * np.linalg.norm(t_channel) + 1e-8)
+
+        line = f"{sw}x{sh} / {tw}x{th}: fftconvolve {timeit(baseline, 3):7.1f} ms"
+        for name, engine in engines:
+            template = PreparedTemplate(target, s_channel.shape, fft=engine)
+            ncc_map(s_channel, template)    # 预热 (pyfftw 规划)
+            line += f", {name} {timeit(lambda: ncc_map(s_channel, template), 3):7.1f} ms"
+        print(line)
+
+
+def tiled_benchmark(workers_list: tuple = (1, 2, 4)):
+    """4K 整图搜索：未分块与分块并行的耗时、峰值内存和结果一致性"""
+    print("== 分块并行 NCC (3840x2160, 模板 120x80) ==")
+    source = make_image(2160, 3840, seed=3).astype(np.uint8)
+    gray = DataHeader().rgb_to_gray(source)
+    target = source[1500:1580, 2600:2720].copy()
+    template = PreparedTemplate(target, source.shape)
+
+    expected = match_ncc(source, template, 0.8, gray)
+    elapsed, peak = traced(lambda: match_ncc(source, template, 0.8, gray))
+    print(f"未分块: {elapsed:6.1f} ms, 峰值额外内存 {peak:6.1f} MB, 结果 {expected}")
+
+    for workers in workers_list:
+        tiler = TiledNCC(tile_size=1024, workers=workers)
+        result = tiler.match(source, template, 0.8, gray)   # 预热分块模板频谱和线程池
+        elapsed, peak = traced(lambda: tiler.match(source, template, 0.8, gray))
+        print(f"分块 workers={workers}: {elapsed:6.1f} ms, 峰值额外内存 {peak:6.1f} MB, "
+              f"{tiler.stats['tiles']} 块, 结果{'一致' if result == expected else '不一致'}")
+        tiler.close()
+
+
+def zero_mean_benchmark(similarity: float = 0.8):
+    """去均值 NCC：平坦亮色区域上的一阶段误报，以及命中时普通 NCC (含边缘验证) 与去均值 NCC 的耗时"""
+    print("== 去均值 NCC (2560x1440) ==")
+    source = make_image(1440, 2560, seed=4)
+    source[:, 1800:] = 230                                   # 右侧为平坦的亮色面板
+    gray = DataHeader().rgb_to_gray(source)
+    absent = make_image(80, 120, seed=5) * 0.2 + 190         # 不在源图中、整体偏亮的模板
+
+    for name, template in [('普通', PreparedTemplate(absent, source.shape)),
+                           ('去均值', PreparedTemplate(absent, source.shape).centered())]:
+        false_hits = int(np.count_nonzero(ncc_map(gray, template) >= similarity))
+        print(f"{name} NCC: 模板不在源图中时 {false_hits} 个窗口的一阶段得分不低于 {similarity}")
+
+    for th, tw in [(100, 100), (600, 800)]:
+        target = source[200:200 + th, 300:300 + tw]
+        plain = PreparedTemplate(target, source.shape)
+        centered = plain.centered()
+        t_plain = timeit(lambda: match_ncc(source, plain, similarity, gray))
+        t_zero = timeit(lambda: match_ncc(source, centered, similarity, gray))
+        print(f"{tw}x{th} 命中: 普通 NCC + 边缘验证 {t_plain:7.1f} ms {match_ncc(source, plain, similarity, gray)}, "
+              f"去均值 NCC {t_zero:7.1f} ms {match_ncc(source, centered, similarity, gray)}")
+
+
+def binary_benchmark(similarity: float = 0.95):
+    """二值匹配：平坦背景上的文字界面，位平面 + 异或计数与 FFT NCC 的耗时和内存对比"""
+    print("== 二值匹配 (平坦背景上的文字) ==")
+    from PIL import Image, ImageDraw, ImageFont
+    from autoxkit.match.binary import BinaryTemplate, binarize_image, match_binary_mask
+
+    rng = np.random.default_rng(6)
+    screen = Image.new('RGB', (1920, 1080), (40, 44, 52))
+    draw = ImageDraw.Draw(screen)
+    font = ImageFont.load_default(size=16)
+    for i in range(200):
+        draw.text((int(rng.integers(0, 1820)), int(rng.integers(0, 1060))), f"Label{i}", fill=(220, 220, 220), font=font)
+    draw.text((1500, 900), "OK?", fill=(220, 220, 220), font=font)
+    screen = np.asarray(screen)
+    target = screen[900:922, 1500:1530]
+
+    for x1, y1, x2, y2 in [(1400, 800, 1800, 1000), (0, 0, 1920, 1080)]:
+        source = screen[y1:y2, x1:x2]
+        gray = DataHeader().rgb_to_gray(source)
+        template = PreparedTemplate(target, source.shape)
+        binary = BinaryTemplate(binarize_image(target))
+        bits = binarize_image(source, gray=gray)
+        t_ncc = timeit(lambda: match_ncc(source, template, similarity, gray))
+        t_bin = timeit(lambda: match_binary_mask(bits, binary, similarity))
+        x, y, mismatch = match_binary_mask(bits, binary, similarity)
+        # 32 倍只是存储的位平面与灰度平面之比；峰值还包括分带构造的 64 位窗口字与计分数组
+        _, peak_ncc = traced(lambda: match_ncc(source, template, similarity, gray))
+        _, peak_bin = traced(lambda: match_binary_mask(bits, binary, similarity))
+        print(f"{x2 - x1}x{y2 - y1} / 30x22: FFT NCC {t_ncc:6.1f} ms, 二值 {t_bin:6.1f} ms "
+              f"(左上角 {(x + x1, y + y1)}, 失配 {mismatch} 位); "
+              f"灰度平面 {gray.nbytes / 1024:7.1f} KB, 位平面 {bits.shape[0] * -(-bits.shape[1] // 8) / 1024:6.1f} KB; "
+              f"峰值内存 FFT NCC {peak_ncc:5.1f} MB, 二值 {peak_bin:5.1f} MB")
+
+
+def prefilter_benchmark(frames: int = 20):
+    """颜色直方图预筛选：对话框只在少数帧出现时，开启与关闭预筛选的平均耗时与拒绝率"""
+    print("== 颜色直方图预筛选 (1920x1080, 对话框 200x120) ==")
+    from autoxkit.match import ArrayFrameSource
+
+    scene = (make_image(1080, 1920, seed=7) // 2 + 60).astype(np.uint8)
+    dialog = np.full((120, 200, 3), 250, dtype=np.uint8)
+    dialog[10:30, 10:150] = (20, 20, 20)
+    dialog[90:110, 120:190] = (30, 120, 230)
+    shown = scene.copy()
+    shown[500:620, 900:1100] = dialog
+
+    match = Match(ArrayFrameSource(scene))
+    sequence = [shown if i % 10 == 9 else scene for i in range(frames)]  # 每 10 帧出现一次
+    for enabled in (False, True):
+        prefilter = match.enable_prefilter() if enabled else None
+        if not enabled:
+            match.disable_prefilter()
+        start = time.perf_counter()
+        for frame in sequence:
+            match.source = ArrayFrameSource(frame)
+            match.match_image(dialog, (0, 0, 1920, 1080), 0.9)
+        elapsed = (time.perf_counter() - start) / len(sequence) * 1000
+        print(f"预筛选{'开启' if enabled else '关闭'}: 平均 {elapsed:6.1f} ms/帧"
+              + (f", {prefilter.info()}" if enabled else ""))
+
+
+def color_spec_benchmark(counts: tuple = (1, 8, 64)):
+    """偏色规则：逐颜色逐通道比较与 ColorSpec (上下界 / 查找表) 的整图耗时和结果一致性"""
+    print("== 偏色找色 (1920x1080) ==")
+    from autoxkit.match import ColorSpec
+
+    rng = np.random.default_rng(8)
+    image = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    tolerance = np.array([10, 5, 20])
+    for count in counts:
+        colors = [tuple(int(c) for c in rng.integers(0, 256, 3)) for _ in range(count)]
+
+        def loop():
+            mask = np.zeros(image.shape[:2], dtype=bool)
+            for color in colors:
+                mask |= np.all(np.abs(image.astype(np.int16) - color) <= tolerance, axis=2)
+            return mask
+
+        spec = ColorSpec(colors, tuple(tolerance.tolist()))
+        spec.compile()
+        same = np.array_equal(loop(), spec.match(image))
+        print(f"{count:3d} 个颜色: 逐颜色比较 {timeit(loop, 3):7.1f} ms, "
+              f"ColorSpec {timeit(lambda: spec.match(image)):6.1f} ms, 结果一致: {same}")
+
+
+def rotation_benchmark(count: int = 36):
+    """旋转匹配：逐角度预先旋转模板后各调用一次 match_image，与 rotations= 旋转库 (共用源图 FFT) 的耗时对比"""
+    print(f"== 旋转匹配 (1280x720, 模板 41x41, {count} 个角度) ==")
+    from autoxkit.match import ArrayFrameSource
+    from autoxkit.match.template import rotate, disc_mask
+
+    source = make_image(720, 1280, seed=9).clip(0, 255).astype(np.uint8)
+    template = np.full((41, 41, 3), 40, dtype=np.uint8)
+    template[18:23, 5:36] = (240, 200, 30)
+    for i in range(8):
+        template[20 - i:21 + i, 28 + i:29 + i] = (240, 200, 30)     # 箭头
+    disc = disc_mask(41) > 0
+    source[300:341, 600:641][disc] = rotate(template, 70)[disc]
+
+    match = Match(ArrayFrameSource(source))
+    angles = [i * 360 / count for i in range(count)]
+    rotated = [rotate(template, angle) for angle in angles]
+    masks = [disc_mask(41)] * count
+
+    def separate():
+        results = [match.match_image(image, (0, 0, 1280, 720), 0.8, mask=mask) for image, mask in zip(rotated, masks)]
+        return max(zip(results, angles), key=lambda r: r[0][1])
+
+    def bank():
+        return match.match_image(template, (0, 0, 1280, 720), 0.8, rotations=count)
+
+    separate(), bank()     # 预热模板缓存
+    print(f"逐角度 match_image: {timeit(separate, 2):7.1f} ms, 结果 {separate()}")
+    print(f"rotations={count}:   {timeit(bank, 2):7.1f} ms, 结果 {bank()}")
+
+
+def cache_budget_check(max_mb: int = 256):
+    """图像缓存字节预算：旋转 / 多尺度搜索生成的子模板计入所属条目，cache_info()['nbytes'] 随模板字节数增长并触发淘汰"""
+    print(f"== 图像缓存字节预算 (1920x1080, 模板 41x41, 预算 {max_mb} MB) ==")
+    import os
+    import tempfile
+    from PIL import Image
+    from autoxkit.match import ArrayFrameSource
+
+    source = make_image(1080, 1920, seed=10).clip(0, 255).astype(np.uint8)
+    match = Match(ArrayFrameSource(source))
+    match.data_header.image_cache.max_bytes = max_mb * 1024 * 1024
+    rect = (0, 0, 1920, 1080)
+
+    with tempfile.TemporaryDirectory() as directory:
+        def load(x: int, y: int, name: str) -> np.ndarray:
+            path = os.path.join(directory, name)
+            Image.fromarray(source[y:y + 41, x:x + 41]).save(path)
+            return match.load_image(path)
+
+        def cached_mb() -> float:
+            return match.cache_info()['nbytes'] / 2 ** 20
+
+        def template_mb(image: np.ndarray) -> float:
+            return (match.template_cache.get(image, (1080, 1920)).nbytes + image.nbytes) / 2 ** 20
+
+        first = load(200, 100, 'first.png')
+        for label, kwargs in [('整图', {}), ('rotations=36', {'rotations': 36}),
+                              ('scales', {'scales': [0.8, 1.25, 1.5]}), ('zero_mean', {'zero_mean': True})]:
+            match.match_image(first, rect, 0.8, **kwargs)
+            print(f"{label:>12}: 模板 {template_mb(first):7.1f} MB, 缓存 {cached_mb():7.1f} MB")
+            assert abs(cached_mb() - template_mb(first)) < 0.01, "缓存字节数未随子模板增长"
+
+        # 第二个模板的旋转库超出预算，最久未使用的第一个模板连同全部子模板一起被淘汰
+        second = load(900, 600, 'second.png')
+        match.match_image(second, rect, 0.8, rotations=36)
+        info = match.cache_info()
+        print(f"第二个模板旋转搜索后: 缓存 {cached_mb():7.1f} MB, 条目 {info['count']}, 淘汰 {info['evictions']}")
+
+
+if __name__ == '__main__':
+    local_energy_benchmark()
+    ncc_benchmark()
+    pyramid_benchmark()
+    conversion_benchmark()
+    tiled_benchmark()
+    fft_backend_benchmark()
+    zero_mean_benchmark()
+    binary_benchmark()
+    prefilter_benchmark()
+    color_spec_benchmark()
+    rotation_benchmark()
+    cache_budget_check()
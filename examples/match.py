@@ -65,6 +65,80 @@ def match_image_example():
         mouse.mouse_move(x, y)
     print(x, y, sim)
 
+def snapshot_example():
+    match = Match()
+
+    # 截图一次，之后的查询都在内存中完成，坐标仍为屏幕坐标
+    snapshot = match.snapshot(rect=(0, 0, 800, 600))
+    print(snapshot.get_pixel_color(x=100, y=100))
+    print(snapshot.match_color(source_color=(100, 100), target_color='#1F2430', similarity=0.8))
+    print(snapshot.find_color(color='#FF0000', similarity=0.9))
+
+    target_image = match.load_image(r"img\1.png")
+    print(snapshot.match_image(target_image=target_image, similarity=0.8))
+    print(snapshot.find_all(target_image=target_image, similarity=0.8))
+
+def record_replay_example():
+    from autoxkit.match import ReplayFrameSource
+
+    target_image = Match().load_image(r"img\1.png")
+    rect = (0, 0, 800, 600)
+
+    # 录制：每次截图都会追加写入录制目录
+    match = Match()
+    match.start_recording(r"record")
+    for _ in range(100):
+        print(match.match_image(target_image=target_image, rect=rect, similarity=0.8))
+    match.stop_recording()
+
+    # 回放：按相同顺序调用即可复现录制时的结果，不需要显示器
+    replay = Match(source=ReplayFrameSource(r"record"))
+    for _ in range(100):
+        print(replay.match_image(target_image=target_image, rect=rect, similarity=0.8))
+
+def masked_match_example():
+    match = Match()
+    rect = (0, 0, 800, 600)
+
+    # 保留 PNG 透明通道，圆角等透明像素不参与匹配，背景变化时无需降低相似度
+    target_image = match.load_image(r"img\1.png", alpha=True)
+    print(match.match_image(target_image=target_image, rect=rect, similarity=0.9))
+
+    # 也可以传入显式掩码，True 的像素参与匹配
+    target_image = match.load_image(r"img\1.png")
+    mask = target_image.sum(axis=2) > 30
+    print(match.find_all(target_image=target_image, rect=rect, similarity=0.9, mask=mask))
+
+def template_library_example():
+    from autoxkit.match import build_library
+
+    # 编译一次：把 img 目录下的所有模板图片打包为一个模板库文件
+    build_library(r"img", r"templates.axl")
+
+    # 启动时只映射文件，不解码图片；名称为相对路径 (不含后缀)
+    match = Match()
+    library = match.load_library(r"templates.axl")
+    print(library.names)
+    print(match.match_image(target_image=library["1"], rect=(0, 0, 800, 600), similarity=0.8))
+
+def glyph_ocr_example():
+    from autoxkit.match import GlyphDict
+
+    match = Match()
+    # 制作字库：截取一张显示 0123456789 的样例 (白色文字)，按顺序切分为字符
+    glyphs = GlyphDict()
+    glyphs.add_sample(match.load_image(r"img\digits.png"), "0123456789", colors=["#FFFFFF"], similarity=0.7)
+    glyphs.save(r"digits.npz")
+
+    # 之后直接加载字库，读取血量等数字
+    glyphs = GlyphDict.load(r"digits.npz")
+    print(match.read_text(glyphs, rect=(100, 100, 220, 130), colors=["#FFFFFF"], similarity=0.7))
+
 if __name__ == '__main__':
     # match_color_example()
+    # snapshot_example()
+    # record_replay_example()
+    # masked_match_example()
+    # template_library_example()
+    # glyph_ocr_example()
     match_image_example()
\ No newline at end of file